@@ -0,0 +1,243 @@
+from argparse import ArgumentParser
+from time import perf_counter
+from typing import NamedTuple
+
+from numpy import (arange, array, flatnonzero, full, int8, int16, int32,
+                   maximum, minimum, ndarray, stack, where, zeros)
+from numpy.random import default_rng
+
+from . import bots
+from .field import fleetSizes
+from .match import playMatch
+from .placement import Placement
+from .rng import seedSequence
+from .tables import tables
+
+_UNTRACKED = 2**31 - 1
+
+
+class BatchResult(NamedTuple):
+    """winners of the games (-1 while a game runs) and shots of shape
+    (games, 2) made by each player"""
+    winners: ndarray
+    shots: ndarray
+
+    def winRate(self, player=0):
+        """get part of the games won by the player"""
+        return (self.winners == player).mean()
+
+    def shotsToWin(self, player=0):
+        """get average count of shots the player made in the games it won"""
+        won = self.winners == player
+        return self.shots[won, player].mean() if won.any() else 0.0
+
+
+def botParams(bot):
+    """get (chance, shipChance) of the EasyBot family bot"""
+    return bot._chance, getattr(bot, '_shipChance', 0)
+
+
+def placeBatch(count, width, height, sizes, rng, probes=64):
+    """Place the same fleet on count boards at once
+
+    Every ship is probed on all boards together, boards which can not fit a
+    ship in given probes are placed again one by one with Placement.
+    Returns x, y and isVertical arrays of shape (count, len(sizes)).
+    """
+    xs, ys, verts = (zeros((count, len(sizes)), int32) for _ in range(3))
+    cover = zeros((count, height * width), bool)
+    placed = full(count, True)
+    for i, size in enumerate(sizes):
+        table = tables.get(width, height, size)
+        todo = flatnonzero(placed)
+        for _ in range(probes):
+            if not len(todo):
+                break
+            n = rng.integers(len(table), size=len(todo))
+            free = ~cover[todo[:, None], table.footprint[n]].any(1)
+            done, n = todo[free], n[free]
+            xs[done, i], ys[done, i], verts[done, i] = table.spots[n].T
+            cover[done[:, None], table.box[n]] = True
+            todo = todo[~free]
+        placed[todo] = False
+    for board in flatnonzero(~placed):
+        layout = Placement(width, height, rng=int(rng.integers(2**63))).placeFleet(sizes)
+        xs[board], ys[board], verts[board] = zip(*((x, y, v) for x, y, v, _ in layout))
+    return xs, ys, verts
+
+
+class BatchBoards:
+    """Boards of many games stacked in NumPy arrays
+
+    Board of the owner o in the game g has index 2*g + o. Cells are flat,
+    the extra last cell is always opened and pads ship cells of short ships.
+    """
+
+    def __init__(self, games, width, height, maxSize, rng) -> None:
+        self.width, self.height = width, height
+        self.sizes = tuple(reversed(fleetSizes(width, height, maxSize)))
+        count, cells = games * 2, width * height
+        xs, ys, verts = placeBatch(count, width, height, self.sizes, rng)
+
+        self.shipIds = full((count, cells), -1, int16 if len(self.sizes) < 2**15 else int32)
+        self.opened = zeros((count, cells + 1), bool)
+        self.opened[:, cells] = True
+        self.shipCells = full((count, len(self.sizes), max(self.sizes, default=1)),
+                              cells, int32)
+        self.boxes = zeros((count, len(self.sizes), 4), int32)
+        self.remaining = array([self.sizes] * count, int8).reshape(count, -1)
+        boards = arange(count)[:, None]
+        for n, size in enumerate(self.sizes):
+            x, y, vert = xs[:, n], ys[:, n], verts[:, n]
+            shipCells = (y * width + x)[:, None] + where(vert, width, 1)[:, None] * arange(size)
+            self.shipIds[boards, shipCells] = n
+            self.shipCells[:, n, :size] = shipCells
+            yEnd, xEnd = y + where(vert, size, 1), x + where(vert, 1, size)
+            self.boxes[:, n] = stack((maximum(y - 1, 0), minimum(yEnd + 1, height),
+                                      maximum(x - 1, 0), minimum(xEnd + 1, width)), 1)
+
+    def reveal(self, boards, ships):
+        """Open borders of the sunk ships"""
+        yStart, yEnd, xStart, xEnd = self.boxes[boards, ships].T
+        rows, cols = arange(self.height), arange(self.width)
+        inRows = (rows >= yStart[:, None]) & (rows < yEnd[:, None])
+        inCols = (cols >= xStart[:, None]) & (cols < xEnd[:, None])
+        box = inRows[:, :, None] & inCols[:, None, :]
+        self.opened[boards, :-1] |= box.reshape(len(boards), self.height * self.width)
+
+
+def simulate(bot1, bot2, games=1000, width=12, height=12, maxSize=None, seed=None):
+    """Play games between two EasyBot family bots in lockstep
+
+    Every step each running game makes one shot. Random shots follow a
+    shuffled order of cells skipping opened ones as in EasyBot.openRandCell,
+    finishing shots open the first not hit cell of the first damaged ship as in
+    EasyBot.damageCurrent, HardBot family picks a random ship to damage when
+    nothing is damaged. Bot 1 shoots first.
+    """
+    rng = default_rng(seed)
+    field = BatchBoards(games, width, height, maxSize, rng)
+    opened, shipIds, remaining = field.opened, field.shipIds, field.remaining
+    chance, shipChance = (array(params) for params in zip(botParams(bot1), botParams(bot2)))
+    cells = width * height
+    order = rng.random((games * 2, cells)).argsort(1).astype(int32)
+    # flat views make the hot lookups one-dimensional
+    flatOrder, flatOpened, flatShipIds = order.ravel(), opened.ravel(), shipIds.ravel()
+    pointer = zeros(games * 2, int32)
+    tracked = full(remaining.shape, _UNTRACKED, int32)
+
+    attacker = zeros(games, int8)
+    shots = zeros((games, 2), int32)
+    winners = full(games, -1, int8)
+    active = arange(games)
+    step = 0
+    while len(active):
+        step += 2
+        count = len(active)
+        att = attacker[active]
+        board = active * 2 + 1 - att
+        alive = remaining[board] > 0
+        damaged = alive & (tracked[board] != _UNTRACKED)
+        hasDamaged = damaged.any(1)
+
+        pick = ~hasDamaged & (rng.integers(10, size=count) < shipChance[att])
+        if pick.any():
+            keys = rng.random((pick.sum(), alive.shape[1]))
+            keys[~alive[pick]] = -1
+            ship = keys.argmax(1)
+            tracked[board[pick], ship] = step
+            damaged[flatnonzero(pick), ship] = True
+            hasDamaged |= pick
+
+        cell = zeros(count, int32)
+        finish = hasDamaged & (rng.integers(10, size=count) < chance[att])
+        if finish.any():
+            fBoard = board[finish]
+            ship = where(damaged[finish], tracked[fBoard], _UNTRACKED).argmin(1)
+            shipCells = field.shipCells[fBoard, ship]
+            notHit = ~opened[fBoard[:, None], shipCells]
+            cell[finish] = shipCells[arange(len(fBoard)), notHit.argmax(1)]
+        rand = ~finish
+        if rand.any():
+            rBoard = board[rand]
+            pos = rBoard * cells + pointer[rBoard]
+            shot = flatOrder[pos]
+            skip = flatOpened[rBoard * (cells + 1) + shot]
+            while skip.any():
+                pos[skip] += 1
+                shot[skip] = flatOrder[pos[skip]]
+                skip[skip] = flatOpened[rBoard[skip] * (cells + 1) + shot[skip]]
+            pointer[rBoard] = pos - rBoard * cells + 1
+            cell[rand] = shot
+
+        flatOpened[board * (cells + 1) + cell] = True
+        shots[active, att] += 1
+        ship = flatShipIds[board * cells + cell]
+        hit = ship >= 0
+        over = zeros(count, bool)
+        if hit.any():
+            hBoard, hShip = board[hit], ship[hit]
+            remaining[hBoard, hShip] -= 1
+            new = rand[hit] & (tracked[hBoard, hShip] == _UNTRACKED)
+            tracked[hBoard[new], hShip[new]] = step + 1
+            sunk = remaining[hBoard, hShip] == 0
+            if sunk.any():
+                field.reveal(hBoard[sunk], hShip[sunk])
+            over[hit] = ~remaining[hBoard].any(1)
+        winners[active[over]] = att[over]
+        attacker[active[~hit]] ^= 1
+        active = active[~over]
+    return BatchResult(winners, shots)
+
+
+def check(bot1, bot2, games=1000, width=12, height=12, maxSize=None, seed=None):
+    """get (batch, match) rows of (winRate, shotsToWin) of both bots
+
+    The same games are played by simulate and one by one by Match, e.g. to
+    check that both count the shots the same way. Rows differ only by
+    the random games.
+    """
+    batch = simulate(bot1, bot2, games, width, height, maxSize, seed)
+    winners = full(games, -1, int8)
+    shots = zeros((games, 2), int32)
+    for n, matchSeed in enumerate(seedSequence(seed).spawn(games)):
+        result = playMatch(bot1, bot2, width, height, maxSize, False, seed=matchSeed)
+        winners[n] = 0 if result.winner is bot1 else 1
+        shots[n] = result.playerShots
+    match = BatchResult(winners, shots)
+    return tuple(tuple((result.winRate(n), result.shotsToWin(n)) for n in range(2))
+                 for result in (batch, match))
+
+
+def main(args=None):
+    parser = ArgumentParser(description='Batch simulation of games between two bots')
+    parser.add_argument('bots', nargs=2, metavar='BOT',
+                        help='bot class names, e.g. EasyBot HardBot')
+    parser.add_argument('-g', '--games', type=int, default=10000)
+    parser.add_argument('-s', '--size', type=int, nargs=2, default=(12, 12),
+                        metavar=('WIDTH', 'HEIGHT'))
+    parser.add_argument('-m', '--max-size', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--check', action='store_true',
+                        help='play the games by Match too and compare')
+    args = parser.parse_args(args)
+
+    players = [getattr(bots, name)() for name in args.bots]
+    if args.check:
+        rows = check(*players, args.games, *args.size, args.max_size, args.seed)
+        for n, name in enumerate(args.bots):
+            (batchRate, batchShots), (matchRate, matchShots) = (row[n] for row in rows)
+            print(f'{name:<12} win {batchRate:7.2%} / {matchRate:7.2%}  '
+                  f'shots/win {batchShots:6.1f} / {matchShots:6.1f}  (batch / match)')
+        return
+    start = perf_counter()
+    result = simulate(*players, args.games, *args.size, args.max_size, args.seed)
+    seconds = perf_counter() - start
+    for n, name in enumerate(args.bots):
+        print(f'{name:<12} win {result.winRate(n):7.2%}  '
+              f'shots/win {result.shotsToWin(n):6.1f}')
+    print(f'{args.games} games in {seconds:.2f}s ({args.games / seconds:.0f} games/s)')
+
+
+if __name__ == '__main__':
+    main()
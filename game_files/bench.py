@@ -0,0 +1,261 @@
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+from datetime import datetime
+from io import StringIO
+import json
+import platform
+import sys
+from time import perf_counter
+import tracemalloc
+
+import numpy
+
+from . import bots
+from .field import Field, colLabel
+from .gridfield import GridField
+from .inputs import ScriptInput
+from .player import Player
+from .rng import makeRandom
+
+SIZES = (5, 8, 12, 16, 32, 100)
+
+
+def measure(setup, run, minTime=0.05):
+    """get seconds per operation
+
+    run(state) does the operations on a state made by setup and returns their
+    count, states are made until minTime seconds of operations are measured.
+    """
+    ops = seconds = 0
+    while seconds < minTime:
+        state = setup()
+        start = perf_counter()
+        ops += run(state)
+        seconds += perf_counter() - start
+    return seconds / ops
+
+
+# cases: setup and run of every benchmark for the board size
+def fieldCase(fieldClass, size, rng):
+    def run(_):
+        fieldClass(size, size, rng=rng)
+        return 1
+    return lambda: None, run
+
+
+def addShipsCase(fieldClass, size, rng):
+    def setup():
+        field = fieldClass(size, size, False, rng=rng)
+        field._fillField()
+        return field
+
+    def run(field):
+        for n, ship in enumerate(field.layout):
+            field._addShip(*ship, n)
+        return len(field.layout)
+    return setup, run
+
+
+def sinkShipsCase(fieldClass, size, rng):
+    def run(field):
+        ships = list(field.ships.values())
+        for ship in ships:
+            for cell in list(ship.shipCells.values()):
+                cell.open()
+        return len(ships)
+    return lambda: fieldClass(size, size, False, rng=rng), run
+
+
+def shoot(field, count, rng):
+    """Open count of random cells, opened ones are skipped"""
+    for _ in range(count):
+        y, x = rng.randrange(field.height), rng.randrange(field.width)
+        if not field[y, x].isOpened():
+            field.open(y, x)
+
+
+def cloneCase(fieldClass, size, rng):
+    def setup():
+        field = fieldClass(size, size, rng=rng)
+        shoot(field, size * size // 3, rng)
+        return field
+
+    def run(field):
+        field.clone()
+        return 1
+    return setup, run
+
+
+def restoreCase(fieldClass, size, rng):
+    def setup():
+        field = fieldClass(size, size, rng=rng)
+        return field, field.snapshot()
+
+    def run(state):
+        field, snapshot = state
+        shoot(field, size, rng)
+        field.restore(snapshot)
+        return 1
+    return setup, run
+
+
+def botCase(botName, size, rng):
+    def setup():
+        bot = getattr(bots, botName)(rng=rng)
+        # players keep only a weak reference to the field
+        field = bot.eField = GridField(size, size, rng=rng)
+        return bot, field
+
+    def run(state):
+        bot, field = state
+        moves = 0
+        while field:
+            bot()
+            moves += 1
+        return moves
+    return setup, run
+
+
+def playerCase(size, rng):
+    def setup():
+        field = GridField(size, size, rng=rng)
+        cells = [(y, x) for y in range(size) for x in range(size)]
+        rng.shuffle(cells)
+        # coords of the cells which are not opened yet when they are read
+        lines = (f'{colLabel(x)}{y + 1}' for y, x in cells if not field[y, x].isOpened())
+        player = Player('bench', inputs=ScriptInput(lines))
+        player.eField = field
+        return player, field
+
+    def run(state):
+        player, field = state
+        moves = 0
+        while field:
+            player()
+            moves += 1
+        return moves
+    return setup, run
+
+
+def renderCase(kind, size, rng):
+    def setup():
+        fields = [GridField(size, size, hidden, rng=rng) for hidden in (False, True)]
+        for field in fields:
+            for _ in range(size * size // 3):
+                field.open(rng.randrange(size), rng.randrange(size))
+        return fields
+
+    def run(fields):
+        with redirect_stdout(StringIO()):
+            if kind == 'str':
+                str(fields[1])
+            else:
+                Field.renderParallel(*fields)
+        return 1
+    return setup, run
+
+
+def cases(sizes):
+    """get iterator of (name, size, case maker)"""
+    for size in sizes:
+        for fieldClass in (Field, GridField):
+            name = fieldClass.__name__
+            yield f'field/{name}', size, lambda rng, c=fieldClass, s=size: fieldCase(c, s, rng)
+            yield f'ships/add/{name}', size, lambda rng, c=fieldClass, s=size: addShipsCase(c, s, rng)
+            yield f'ships/sink/{name}', size, lambda rng, c=fieldClass, s=size: sinkShipsCase(c, s, rng)
+            yield f'clone/{name}', size, lambda rng, c=fieldClass, s=size: cloneCase(c, s, rng)
+            yield f'restore/{name}', size, lambda rng, c=fieldClass, s=size: restoreCase(c, s, rng)
+        for botName in ('EasyBot', 'HardBot', 'ExpertBot'):
+            yield f'bots/{botName}', size, lambda rng, b=botName, s=size: botCase(b, s, rng)
+        yield 'player/input', size, lambda rng, s=size: playerCase(s, rng)
+        for kind in ('str', 'parallel'):
+            yield f'render/{kind}', size, lambda rng, k=kind, s=size: renderCase(k, s, rng)
+# end
+
+
+def runBench(sizes=SIZES, repeat=3, minTime=0.05, seed=0, match=''):
+    """get {'name/size': best seconds per operation}"""
+    results = {}
+    for name, size, case in cases(sizes):
+        if match not in name:
+            continue
+        rng = makeRandom(seed)
+        results[f'{name}/{size}'] = min(measure(*case(rng), minTime) for _ in range(repeat))
+    return results
+
+
+def memory(sizes=SIZES, seed=0):
+    """get {'name/size': bytes kept by one object} of the boards and players"""
+    makers = [(f'board/{fieldClass.__name__}', size,
+               lambda rng, c=fieldClass, s=size: c(s, s, rng=rng))
+              for size in sizes for fieldClass in (Field, GridField)]
+    makers.append(('player/Player', 0, lambda rng: Player('bench')))
+    results = {}
+    for name, size, make in makers:
+        rng = makeRandom(seed)
+        tracemalloc.start()
+        start = tracemalloc.get_traced_memory()[0]
+        kept = make(rng)
+        results[f'{name}/{size}'] = tracemalloc.get_traced_memory()[0] - start
+        tracemalloc.stop()
+        del kept
+    return results
+
+
+def compare(results, baseline, threshold=0.2):
+    """get rows (key, baseline, result, ratio, isRegression) of common benchmarks"""
+    return [(key, baseline[key], results[key], results[key] / baseline[key],
+             results[key] > baseline[key] * (1 + threshold))
+            for key in results if key in baseline]
+
+
+def main(args=None):
+    parser = ArgumentParser(description='Benchmarks of the hot paths')
+    parser.add_argument('-s', '--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('-r', '--repeat', type=int, default=3)
+    parser.add_argument('-t', '--min-time', type=float, default=0.05,
+                        help='seconds measured per repeat')
+    parser.add_argument('-k', '--match', default='', help='run only names containing it')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--memory', action='store_true',
+                        help='measure bytes per board and player instead of time')
+    parser.add_argument('--save', metavar='FILE', help='write results as a JSON baseline')
+    parser.add_argument('--compare', metavar='FILE', help='compare with a JSON baseline')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='slowdown flagged as a regression, 0.2 is 20%%')
+    args = parser.parse_args(args)
+
+    if args.memory:
+        print(f"{'object':<28}{'bytes':>12}")
+        for key, size in memory(args.sizes, args.seed).items():
+            print(f'{key:<28}{size:>12}')
+        return
+    results = runBench(args.sizes, args.repeat, args.min_time, args.seed, args.match)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as bFile:
+            baseline = json.load(bFile)['results']
+        rows = compare(results, baseline, args.threshold)
+        print(f"{'benchmark':<28}{'base us':>12}{'now us':>12}{'ratio':>8}")
+        for key, old, new, ratio, isRegression in rows:
+            print(f'{key:<28}{old*1e6:>12.2f}{new*1e6:>12.2f}{ratio:>8.2f}'
+                  f"{'  REGRESSION' if isRegression else ''}")
+        regressions = sum(row[-1] for row in rows)
+        print(f'{regressions} of {len(rows)} benchmarks slower than '
+              f'{1 + args.threshold:.2f}x the baseline')
+    else:
+        print(f"{'benchmark':<28}{'us/op':>12}")
+        for key, seconds in results.items():
+            print(f'{key:<28}{seconds*1e6:>12.2f}')
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as bFile:
+            json.dump({'meta': {'date': datetime.now().isoformat(timespec='seconds'),
+                                'python': platform.python_version(),
+                                'numpy': numpy.__version__,
+                                'machine': platform.platform()},
+                       'results': results}, bFile, indent=4)
+    if args.compare and regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
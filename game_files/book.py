@@ -0,0 +1,204 @@
+from argparse import ArgumentParser
+import os
+from pathlib import Path
+import sqlite3
+from threading import local
+from time import perf_counter
+
+from numpy import arange, asarray, frombuffer, ones, zeros
+
+from .field import fleetSizes
+from .placement import Placement
+from .rng import makeRandom
+
+# lines of another version are built again
+VERSION = 1
+# seed of the sampled layouts, so a line does not depend on the process
+# which has built it
+SEED = 0x5eb00c
+# cached lookup of a line which is not in the file
+_MISSING = object()
+
+
+def symmetries(width, height):
+    """get permutations of the flat cells by the flips and rotations of the field
+
+    The cell i of an image of the field is the cell perm[i] of the field.
+    Square fields have eight symmetries, the others four.
+    """
+    cells = arange(width * height).reshape(height, width)
+    images = [cells, cells[:, ::-1], cells[::-1], cells[::-1, ::-1]]
+    if width == height:
+        images += [image.T for image in images]
+    return [image.ravel() for image in images]
+
+
+def buildLine(width, height, sizes, samples=1024, minLeft=64, rng=None):
+    """get flat cells of the first shots made while every shot misses
+
+    Layouts are placed like the fields place them and each of them is
+    counted in all its images under the symmetries. The next shot is the
+    cell taken by ships in most of the images which are left after the
+    misses, the line ends when fewer than minLeft images are left.
+    """
+    rng = makeRandom(rng)
+    cells = width * height
+    ships = zeros((samples, cells), bool)
+    for n in range(samples):
+        placement = Placement(width, height, rng=rng)
+        for x, y, isVert, size in placement.placeFleet(tuple(sorted(sizes, reverse=True))):
+            ships[n].reshape(height, width)[
+                (slice(y, y + size), x) if isVert else (y, slice(x, x + size))] = True
+    # the image of the layout n by the symmetry g is left while the cells
+    # perm[line] of the layout are empty
+    perms = symmetries(width, height)
+    left = ones((len(perms), samples), bool)
+    line = []
+    opened = zeros(cells, bool)
+    while left.sum() >= minLeft and len(line) < cells:
+        counts = sum(ships[rows].sum(0)[perm] for rows, perm in zip(left, perms))
+        counts[opened] = -1
+        cell = int(counts.argmax())
+        line.append(cell)
+        opened[cell] = True
+        for rows, perm in zip(left, perms):
+            rows &= ~ships[:, perm[cell]]
+    return line
+
+
+class OpeningBook:
+    """Opening lines per (width, height, fleet) kept in a SQLite file
+
+    A line is the order of cells a bot shoots while it has not hit anything,
+    see buildLine. A field and its transpose share one line, it is kept for
+    the field which is not wider than high. Lines are built on the first
+    lookup for fields up to autoBuild cells, bigger ones are built by
+    build or by running the module. Lines and missing lines of the file
+    are cached. Every thread gets its own connection, a forked process
+    opens new ones.
+    """
+    _fileName = os.path.join(str(Path(__file__).resolve().parent),
+                             'gameData', 'OpeningBook.sqlite3')
+    autoBuild = 256
+
+    def __init__(self, fileName=None, samples=1024, minLeft=64) -> None:
+        self.fileName = fileName or self._fileName
+        self.samples = samples
+        self.minLeft = minLeft
+        self._local = local()
+        self._lines = {}
+        self.stats = {'hits': 0, 'misses': 0, 'built': 0}
+
+    @property
+    def conn(self):
+        """get the connection of the thread, the file is opened on the first access"""
+        state = self._local
+        # a connection inherited from the parent process is not used
+        if getattr(state, 'pid', None) != os.getpid():
+            state.conn = sqlite3.connect(self.fileName)
+            state.pid = os.getpid()
+            with state.conn:
+                state.conn.execute(
+                    'CREATE TABLE IF NOT EXISTS lines (width INTEGER, height INTEGER, '
+                    'fleet TEXT, version INTEGER, samples INTEGER, line BLOB NOT NULL, '
+                    'PRIMARY KEY (width, height, fleet))')
+        return state.conn
+
+    @staticmethod
+    def _key(width, height, sizes):
+        """get key of the stored line: (width, height, fleet), width <= height"""
+        return min(width, height), max(width, height), ','.join(map(str, sorted(sizes)))
+
+    @staticmethod
+    def _dtype(width, height):
+        return '<u2' if width * height <= 2**16 else '<u4'
+
+    # lookup methods
+    def line(self, width, height, sizes=None, build=None):
+        """get flat cells of the line of the field or None
+
+        sizes are the fleet of the field by default. Without build a missing
+        line is built when the field has at most autoBuild cells.
+        """
+        sizes = fleetSizes(width, height) if sizes is None else sizes
+        key = self._key(width, height, sizes)
+        line = self._lines.get(key)
+        if line is None or line is _MISSING and build:
+            line = self._load(key) if line is None else None
+            if line is None and (build or build is None and width * height <= self.autoBuild):
+                line = self.build(width, height, sizes)
+            line = self._lines[key] = _MISSING if line is None else line
+        if line is _MISSING:
+            self.stats['misses'] += 1
+            return None
+        self.stats['hits'] += 1
+        if width > height:
+            # the line is kept for the transpose
+            y, x = divmod(line, height)
+            return x * width + y
+        return line
+
+    def opening(self, width, height, sizes=None, rng=None):
+        """get line of the field turned by a random symmetry as a list or None"""
+        line = self.line(width, height, sizes)
+        if line is None:
+            return None
+        perms = symmetries(width, height)
+        return perms[makeRandom(rng).randrange(len(perms))][line].tolist()
+
+    def _load(self, key):
+        """get line by given key from the file or None"""
+        row = self.conn.execute(
+            'SELECT line FROM lines WHERE width = ? AND height = ? AND fleet = ? '
+            'AND version = ?', (*key, VERSION)).fetchone()
+        return None if row is None else frombuffer(row[0], self._dtype(*key[:2])).astype(int)
+    # end
+
+    # build methods
+    def build(self, width, height, sizes=None, samples=None):
+        """Build the line of the field and store it, returns it for the stored field"""
+        sizes = fleetSizes(width, height) if sizes is None else sizes
+        key = self._key(width, height, sizes)
+        samples = samples or self.samples
+        line = asarray(buildLine(*key[:2], sizes, samples, self.minLeft, SEED), int)
+        with self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO lines VALUES (?, ?, ?, ?, ?, ?)',
+                              (*key, VERSION, samples,
+                               line.astype(self._dtype(*key[:2])).tobytes()))
+        self._lines[key] = line
+        self.stats['built'] += 1
+        return line
+
+    def close(self):
+        """Close the connection of the thread"""
+        state = self._local
+        if getattr(state, 'pid', None) == os.getpid():
+            state.conn.close()
+        state.pid = None
+    # end
+
+
+# book of the bots
+book = OpeningBook()
+
+
+def main(args=None):
+    parser = ArgumentParser(description='Build opening lines of the bots')
+    parser.add_argument('sizes', type=int, nargs='*', default=[12, 12],
+                        metavar='WIDTH HEIGHT', help='pairs of field sides')
+    parser.add_argument('-m', '--max-size', type=int, default=None,
+                        help='max size of the ships')
+    parser.add_argument('-n', '--samples', type=int, default=book.samples,
+                        help='sampled layouts, each counts in all its images')
+    args = parser.parse_args(args)
+
+    for width, height in zip(args.sizes[::2], args.sizes[1::2]):
+        start = perf_counter()
+        book.build(width, height, fleetSizes(width, height, args.max_size), args.samples)
+        line = book.line(width, height, fleetSizes(width, height, args.max_size))
+        print(f'{width}x{height}: {len(line)} shots in {perf_counter() - start:.2f}s')
+    book.close()
+
+
+if __name__ == '__main__':
+    main()
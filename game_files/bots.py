@@ -1,53 +1,73 @@
-from itertools import product as prod
+from concurrent.futures import ProcessPoolExecutor
 import os
 from pathlib import Path
-from random import choice, randrange as rrange, shuffle
-import json
+from numpy import where
 
 
+from .book import book
+from .cellindex import CellIndex
 from .field import Field
+from .gridfield import OPENED, SHIP, GridField
+from .heatmap import UNKNOWN, Heatmap
+from .montecarlo import sampleCounts
 from .player import PlayerBase
+from .rng import makeRandom
 from .jsdata import DataBase
+from .tables import tables
 
 
 class BotData(DataBase):
     _fileName = os.path.join(str(Path(__file__).resolve().parent),
                              'gameData', 'BotsData.json')
 
-    def loadPlayers(self):
-        try:
-            with open(self._fileName, 'r', encoding='utf-8') as pFile:
-                self.players = {name: globals()[name](**data)
-                                for name, data in json.load(pFile).items()}
-        except Exception as ex:
-            return
+    def _makePlayer(self, name, data):
+        return globals()[name](**data)
 
 
 class BotBase(PlayerBase):
 
-    def __init__(self, wins=0, losses=0) -> None:
+    def __init__(self, wins=0, losses=0, shots=0, rng=None) -> None:
         super().__init__(type(self).__name__)
         self.wins = wins
         self.losses = losses
+        # shots made in the won games
+        self.shots = shots
+        # seed or random.Random of all random choices of the bot
+        self.rng = makeRandom(rng)
+
+    def toJS(self):
+        data = super().toJS()
+        del data['rng']
+        return data
 
-    def updateScores(self, win):
+    def updateScores(self, win, shots=0):
         if win:
             self.wins += 1
+            self.shots += shots
             return
         self.losses += 1
 
 
 class EasyBot(BotBase):
-
-    def __init__(self, wins=0, losses=0) -> None:
-        super().__init__(wins, losses)
-        self.__combos = None
+    """Bot which shoots random cells and with some chance finishes the ship
+    it has hit
+
+    Not opened cells are kept in a CellIndex which the field updates about
+    every opened and revealed cell, and every hit ship gets a frontier of
+    its cells which are left, so a move costs the same on any field.
+    """
+
+    def __init__(self, wins=0, losses=0, shots=0, rng=None) -> None:
+        super().__init__(wins, losses, shots, rng)
+        self._unopened = None
+        self._frontier = {}
         self._chance = 1
         self._damagedShips = []
 
     def toJS(self):
-        del self.__combos, self._chance, self._damagedShips
-        return super().toJS()
+        data = super().toJS()
+        del data['_unopened'], data['_frontier'], data['_chance'], data['_damagedShips']
+        return data
 
     @property
     def eField(self) -> Field:
@@ -56,80 +76,264 @@ class EasyBot(BotBase):
     @eField.setter
     def eField(self, eField):
         PlayerBase.eField.fset(self, eField)
-        self.__combos = list(
-            prod(range(eField.width), range(eField.height)))
-        shuffle(self.__combos)
+        self._damagedShips = []
+        self._frontier = {}
+        self._unopened = CellIndex(eField.width * eField.height)
+        self.cellsOpened(eField.openedCells())
+        eField.watch(self)
+
+    def cellsOpened(self, cells):
+        """Remove opened cells by given flat indexes from the index"""
+        discard = self._unopened.discard
+        for cell in cells:
+            discard(cell)
 
     def addShip(self, ship):
         if ship and not ship.botRef:
             ship.addBotRef(self)
             self._damagedShips.append(ship)
+            # cells of the ship popped from the end
+            self._frontier[ship.num] = [y*self.eField.width + x
+                                        for y, x in reversed(ship.cells())]
 
     def removeShip(self, ship):
         self._damagedShips.remove(ship)
-
-    def openCell(self, cell):
-        flag = cell.open()
-        flag and self.addShip(cell.ship)
+        self._frontier.pop(ship.num, None)
+
+    def resume(self):
+        """Take ships hit before the bot got the field"""
+        for ship in tuple(self.eField.ships.values()):
+            if len(ship.shipCells) < ship.size:
+                self.addShip(ship)
+
+    def openCell(self, y, x):
+        eField = self.eField
+        flag = eField.open(y, x)
+        flag and self.addShip(eField.shipAt(y, x))
         return flag
 
     def openRandCell(self):
-        coords = self.__combos.pop()
-        while self.eField[coords].isOpened():
-            coords = self.__combos.pop()
-        return self.openCell(self.eField[coords])
+        return self.openCell(*divmod(self._unopened.pop(self.rng), self.eField.width))
 
     def damageCurrent(self):
         if not self._damagedShips:
             return
-        return next(iter(self._damagedShips[0].shipCells.values())).open()
+        cells = self._frontier[self._damagedShips[0].num]
+        # cells hit by random shots are skipped
+        while cells[-1] not in self._unopened:
+            cells.pop()
+        cell = cells.pop()
+        self._unopened.discard(cell)
+        return self.openCell(*divmod(cell, self.eField.width))
 
     def __call__(self) -> tuple[int]:
-        if rrange(10) < self._chance and self.damageCurrent():
+        if self.rng.randrange(10) < self._chance and self.damageCurrent():
             return True
         return self.openRandCell()
 
 
 class MediumBot(EasyBot):
 
-    def __init__(self, wins=0, losses=0) -> None:
-        super().__init__(wins, losses)
+    def __init__(self, wins=0, losses=0, shots=0, rng=None) -> None:
+        super().__init__(wins, losses, shots, rng)
         self._chance = 3
 
 
 class HardBot(EasyBot):
-    def __init__(self, wins=0, losses=0) -> None:
-        super().__init__(wins, losses)
+    def __init__(self, wins=0, losses=0, shots=0, rng=None) -> None:
+        super().__init__(wins, losses, shots, rng)
         self._chance = 3
         self._shipChance = 1
 
     def toJS(self):
-        del self._shipChance
-        return super().toJS()
+        data = super().toJS()
+        del data['_shipChance']
+        return data
 
     def chooseRandShip(self):
-        return choice(tuple(self.eField.ships.values()))
+        return self.eField.randShip(self.rng)
 
     def __call__(self) -> tuple[int]:
-        if (not self._damagedShips) and rrange(10) < self._shipChance:
+        if (not self._damagedShips) and self.rng.randrange(10) < self._shipChance:
             self.addShip(self.chooseRandShip())
         return super().__call__()
 
 
 class VeryHardBot(HardBot):
 
-    def __init__(self, wins=0, losses=0) -> None:
-        super().__init__(wins, losses)
+    def __init__(self, wins=0, losses=0, shots=0, rng=None) -> None:
+        super().__init__(wins, losses, shots, rng)
         self._chance = 10
         self._shipChance = 1
 
 
 class UnrealBot(VeryHardBot):
 
-    def __init__(self, wins=0, losses=0) -> None:
-        super().__init__(wins, losses)
+    def __init__(self, wins=0, losses=0, shots=0, rng=None) -> None:
+        super().__init__(wins, losses, shots, rng)
         self._shipChance = 10
 
 
+class ExpertBot(EasyBot):
+    """Fair bot which shoots the cell covered by most placements of the
+    remaining fleet, see Heatmap
+
+    Until the first hit the shots follow the line of the opening book turned
+    by a random symmetry, set openingBook to None to go without it.
+    """
+    openingBook = book
+
+    def __init__(self, wins=0, losses=0, shots=0, rng=None) -> None:
+        super().__init__(wins, losses, shots, rng)
+        self._heatmap = None
+        self._sunk = None
+        self._opening = None
+
+    def toJS(self):
+        data = super().toJS()
+        del data['_heatmap'], data['_sunk'], data['_opening']
+        return data
+
+    @property
+    def eField(self) -> Field:
+        return super().eField
+
+    @eField.setter
+    def eField(self, eField):
+        PlayerBase.eField.fset(self, eField)
+        self._damagedShips = []
+        self._heatmap = Heatmap(eField.width, eField.height, eField._sizes)
+        self._opening = None
+        if self.openingBook is not None:
+            opening = self.openingBook.opening(eField.width, eField.height,
+                                               eField._sizes, self.rng)
+            # cells are popped from the end
+            self._opening = opening and opening[::-1]
+
+    def removeShip(self, ship):
+        super().removeShip(ship)
+        self._sunk = ship.x, ship.y, ship.isVertical, ship.size
+
+    def resume(self):
+        """Rebuild the heatmap from the opened cells of the field"""
+        super().resume()
+        eField = self.eField
+        opened = eField.state & OPENED != 0
+        if opened.any():
+            # the line is followed only from the first shot
+            self._opening = None
+        self._heatmap.load(opened, opened & (eField.state & SHIP != 0),
+                           [ship for n, ship in enumerate(eField.layout)
+                            if n not in eField.ships])
+
+    def _target(self):
+        """get coords of the next shot"""
+        return self._heatmap.best()
+
+    def _bookMove(self):
+        """get coords of the next shot of the opening or None"""
+        if self._opening:
+            return divmod(self._opening.pop(), self.eField.width)
+        return None
+
+    def __call__(self) -> tuple[int]:
+        y, x = self._bookMove() or self._target()
+        eField = self.eField
+        ships = len(eField.ships)
+        flag = self.openCell(y, x)
+        self._heatmap.observe(y, x, flag)
+        if flag:
+            self._opening = None
+        if len(eField.ships) < ships:
+            # a ship sunk by its first hit is a single cell ship
+            self._heatmap.sink(*(self._sunk or (x, y, 0, 1)))
+            self._sunk = None
+        return flag
+
+
+class MonteCarloBot(ExpertBot):
+    """Fair bot which samples random fleet layouts consistent with what it has
+    seen and shoots the cell taken by ships in most of them
+
+    Sampling stops when budget seconds per move are spent, with workers it
+    runs on a process pool, so more cores give more samples in the same time.
+    The heatmap is used when no layout has been sampled.
+    """
+
+    def __init__(self, wins=0, losses=0, shots=0, budget=0.05, workers=0,
+                 rng=None) -> None:
+        super().__init__(wins, losses, shots, rng)
+        self.budget = budget
+        self.workers = workers
+        self.samplesPerSecond = 0
+        self._pool = None
+
+    def toJS(self):
+        data = super().toJS()
+        del data['budget'], data['workers'], data['samplesPerSecond'], data['_pool']
+        return data
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            # forked workers share the read-only tables of the fleet
+            eField = self.eField
+            tables.warm(eField.width, eField.height, eField._sizes)
+            self._pool = ProcessPoolExecutor(self.workers)
+        return self._pool
+
+    def close(self):
+        """Shut down the worker pool"""
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def __sample(self, known, sizes):
+        """get counts of ships over cells and count of the samples"""
+        if not self.workers:
+            return sampleCounts(known, sizes, self.budget, self.rng.getrandbits(64))
+        jobs = [self.pool.submit(sampleCounts, known, sizes, self.budget,
+                                 self.rng.getrandbits(64)) for _ in range(self.workers)]
+        counts, samples, seconds = jobs[0].result()
+        for job in jobs[1:]:
+            jobCounts, jobSamples, jobSeconds = job.result()
+            counts += jobCounts
+            samples += jobSamples
+            seconds = max(seconds, jobSeconds)
+        return counts, samples, seconds
+
+    def _target(self):
+        known = self._heatmap.known
+        sizes = tuple(self._heatmap.fleet.elements())
+        counts, samples, seconds = self.__sample(known, sizes)
+        self.samplesPerSecond = samples / seconds if seconds else 0
+        if not samples:
+            return super()._target()
+        return divmod(int(where(known == UNKNOWN, counts, -1).argmax()),
+                      self._heatmap.width)
+
+    def __del__(self):
+        self.close()
+
+
+def botMove(name, data, seed=None):
+    """get (y, x) of the next shot of the bot by given packed field
+
+    Runs in worker threads and processes: a new bot resumes the game on the
+    unpacked copy of the field and shoots it, the real field is not touched.
+    """
+    field = GridField.unpack(data)
+    bot = globals()[name](rng=seed)
+    bot.eField = field
+    bot.resume()
+    bot()
+    return tuple(map(int, field.lastShot))
+
+
+# bots of the game modes
+MODES = {'easy': EasyBot, 'medium': MediumBot, 'hard': HardBot,
+         'veryHard': VeryHardBot, 'unreal': UnrealBot, 'expert': ExpertBot}
+
+
 if __name__ == '__main__':
     pass
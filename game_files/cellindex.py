@@ -0,0 +1,54 @@
+from array import array
+
+from numpy import arange, int32
+
+
+class CellIndex:
+    """Set of flat cell indexes with O(1) random pick and removal
+
+    Cells are kept in an array, a removed cell is swapped with the last one
+    and the position of every cell is kept in a second array, -1 marks the
+    removed cells.
+    """
+    __slots__ = ('_cells', '_pos')
+
+    def __init__(self, count) -> None:
+        cells = arange(count, dtype=int32).tobytes()
+        self._cells = array('i', cells)
+        self._pos = array('i', cells)
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def __contains__(self, cell) -> bool:
+        return self._pos[cell] >= 0
+
+    def discard(self, cell):
+        """Remove the cell if it is in the index"""
+        pos = self._pos[cell]
+        if pos < 0:
+            return
+        last = self._cells.pop()
+        if last != cell:
+            self._cells[pos] = last
+            self._pos[last] = pos
+        self._pos[cell] = -1
+
+    def pick(self, rng):
+        """get random cell of the index"""
+        return self._cells[rng.randrange(len(self._cells))]
+
+    def pop(self, rng):
+        """Remove random cell of the index and get it"""
+        cells, positions = self._cells, self._pos
+        pos = rng.randrange(len(cells))
+        cell, last = cells[pos], cells.pop()
+        if last != cell:
+            cells[pos] = last
+            positions[last] = pos
+        positions[cell] = -1
+        return cell
+
+
+if __name__ == '__main__':
+    pass
@@ -1,8 +1,5 @@
-from weakref import ref
-
-
 class Cell:
-    __slots__ = ('__weakref__', '_current', 'opened')
+    __slots__ = ('_current', 'opened')
     _opened = u"\u00B7"
 
     def __init__(self) -> None:
@@ -40,18 +37,17 @@ class BorderCell(Cell):
 class ShipCell(Cell):
     _opened = 'X'
     _unhidden = u'\u25A8'
-    __slots__ = ('_ship', 'number')
+    __slots__ = ('ship', 'number')
 
     def __init__(self, ship, number, hidden=True) -> None:
         super().__init__()
         if not hidden:
             self._current = self._unhidden
-        self._ship = ref(ship)
+        self.ship = ship
         self.number = number
 
-    @property
-    def ship(self):
-        return self._ship()
+    def reveal(self):
+        """Ship cells are shown by their hits"""
 
     def open(self):
         super().open()
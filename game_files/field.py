@@ -1,72 +1,194 @@
-from itertools import product as prod
-from numpy import array, ndarray
-from random import randrange as rrange
+from copy import copy
 from string import ascii_uppercase as aUpper
+from typing import NamedTuple
+from weakref import ref
 
 from .cells import Cell
+from .rng import makeRandom
 from .ship import Ship
 
 
+# sides of the largest classic field, bigger fields get a fleet per area
+CLASSIC_SIZE = 16
+LARGE_MAX_SIZE = 6
+
+
+def fleetSizes(width, height, maxSize=None):
+    """get sizes of the ships for the field in ascending order
+
+    Fields bigger than the classic ones get a copy of the fleet of
+    (2*maxSize)x(2*maxSize) field for every such area.
+    """
+    large = max(width, height) > CLASSIC_SIZE
+    if maxSize is None and large:
+        maxSize = LARGE_MAX_SIZE
+    if maxSize is None or maxSize*2 > min(width, height):
+        maxSize = min(width, height)//2
+    sizes = sum(((i,)*(maxSize - i) for i in range(1, maxSize)), start=())
+    if not large:
+        return sizes
+    copies = max(width * height // (2*maxSize)**2, 1)
+    return tuple(size for size in sizes for _ in range(copies))
+
+
+class Snapshot(NamedTuple):
+    """State of the shots of a field, see Field.snapshot"""
+    cells: object
+    hits: tuple
+    alive: tuple
+    lastShot: tuple = None
+    focus: tuple = None
+
+
+def colLabel(n):
+    """get label of the column by given index: A..Z, AA..ZZ, AAA.."""
+    label = ''
+    n += 1
+    while n:
+        n, rest = divmod(n - 1, 26)
+        label = aUpper[rest] + label
+    return label
+
+
+def colIndex(label):
+    """get index of the column by given label"""
+    n = 0
+    for letter in label.upper():
+        n = n*26 + aUpper.index(letter) + 1
+    return n - 1
+
+
 class Field:
+    # max count of rows and columns rendered, bigger fields are rendered
+    # through a window around the focus cell
+    viewSize = 26
 
     # initialization methods
-    def __init__(self, width, height, hidden=True, maxSize=None) -> None:
+    def __init__(self, width, height, hidden=True, maxSize=None, layout=None,
+                 rng=None) -> None:
         self.width = width
         self.height = height
         self._hidden = hidden
-        self.__setSize(maxSize)
-        self.__fillField()
-        self.genShips()
+        # seed or random.Random of the placement and random choices
+        self.rng = makeRandom(rng)
+        self.focus = self.lastShot = None
+        self._view = None
+        # weak references to the objects told about opened cells, see watch
+        self._watchers = []
+        self.__setSize(maxSize, layout)
+        self._fillField()
+        self.genShips(layout)
 
-    def __setSize(self, maxSize):
+    @classmethod
+    def fromLayout(cls, width, height, layout, hidden=True, rng=None):
+        """Create field with given ships [(x, y, isVertical, size)]"""
+        return cls(width, height, hidden, layout=layout, rng=rng)
+
+    def __setSize(self, maxSize, layout=None):
         """Set available size of the ships"""
-        if maxSize is None or maxSize*2 > min(self.width, self.height):
-            maxSize = min(self.width, self.height)//2
-        self.__sizes = sum(((i,)*(maxSize - i)
-                           for i in range(1, maxSize)), start=())
+        if layout is None:
+            self._sizes = fleetSizes(self.width, self.height, maxSize)
+        else:
+            self._sizes = tuple(sorted(ship[3] for ship in layout))
 
-    def __fillField(self):
+    def _fillField(self):
         """Fill the field with cells"""
-        self.field: ndarray[Cell] = array([[Cell() for _ in range(self.width)]
-                                          for _ in range(self.height)])
+        from numpy import array
+        # object grid of the cells
+        self.field = array([[Cell() for _ in range(self.width)]
+                            for _ in range(self.height)])
         self.ships = {}
+        # all ships in the order of their numbers, sunk ones too
+        self._fleet = []
     # end
 
     # gen methods
-    def genShips(self):
-        """Generate ships by given sizes"""
-        for n, size in enumerate(reversed(self.__sizes)):
-            if not self.__genShip(size, n):
-                self.__fillField()
-                break
-        else:
-            return
-        self.genShips()
-
-    def __genShip(self, size, n):
-        """Generate ship by given size"""
-        count = 0
-        while True:
-            x, y, check, isVert = self.__randDir(size)
-            if all(not self[y, x] for x, y in check):
-                self.ships[n] = Ship(x, y, isVert, size, self, n)
-                return True
-            count += 1
-            if count >= self.width * self.height:
-                return False
-
-    def __randDir(self, size):
-        """Get random direction and coordinates for given size"""
-        isVert = rrange(2)
-        if isVert:
-            x = rrange(self.width)
-            y = rrange(self.height - size + 1)
-            check = prod([x], range(y, y + size))
-        else:
-            x = rrange(self.width - size + 1)
-            y = rrange(self.height)
-            check = prod(range(x, x + size), [y])
-        return x, y, check, isVert
+    def genShips(self, layout=None):
+        """Generate ships by given sizes or put ships of the layout"""
+        self.placeStats = None
+        if layout is None:
+            from .placement import Placement
+            placement = Placement(self.width, self.height, rng=self.rng)
+            layout = placement.placeFleet(tuple(reversed(self._sizes)))
+            # fields may be made ahead by a pool, so the game counts the stats
+            # of the fields it plays
+            self.placeStats = placement.stats
+        # ships as (x, y, isVertical, size) in the order of their numbers
+        self.layout = layout
+        for n, ship in enumerate(layout):
+            self._addShip(*ship, n)
+
+    def _addShip(self, x, y, isVert, size, n):
+        """Put ship on the field"""
+        ship = self.ships[n] = Ship(x, y, isVert, size, self, n)
+        self._fleet.append(ship)
+    # end
+
+    # shot methods
+    def open(self, y, x):
+        """Open cell by given coords, returns True if a ship has been hit"""
+        self.lastShot = self.focus = y, x
+        return self.field[y, x].open()
+
+    def shipAt(self, y, x):
+        """get ship by given coords"""
+        return getattr(self.field[y, x], 'ship', None)
+
+    def openedCells(self):
+        """get flat indexes of the opened cells"""
+        return [y*self.width + x for y, row in enumerate(self.field)
+                for x, cell in enumerate(row) if cell.opened]
+
+    def watch(self, watcher):
+        """Call watcher.cellsOpened(cells) with flat indexes of the cells
+        opened by the field itself, e.g. borders revealed around a sunk ship
+        or cells of openMany, the shooter knows the cell it opens. The
+        watcher is kept by a weak reference"""
+        self._watchers.append(ref(watcher))
+
+    def _notify(self, cells):
+        """Tell the watchers about opened cells"""
+        for watcher in self._watchers:
+            watcher = watcher()
+            if watcher is not None:
+                watcher.cellsOpened(cells)
+    # end
+
+    # snapshot methods
+    def snapshot(self) -> Snapshot:
+        """get state of the shots which restore puts back
+
+        Ships and cells are not copied, only what the shots change is kept.
+        Watchers and bots which follow the ships are not told about restore,
+        so a search which shoots hypothetical cells should shoot a clone.
+        """
+        return Snapshot(tuple((cell.opened, cell._current) for cell in self.field.flat),
+                        tuple(ship.hits for ship in self._fleet), tuple(self.ships),
+                        self.lastShot, self.focus)
+
+    def restore(self, snapshot):
+        """Put back state of the shots saved by snapshot of the field or its clone"""
+        for cell, (opened, current) in zip(self.field.flat, snapshot.cells):
+            cell.opened, cell._current = opened, current
+        for ship, hits in zip(self._fleet, snapshot.hits):
+            ship.hits = hits
+        self.ships = {n: self._fleet[n] for n in snapshot.alive}
+        self.lastShot, self.focus = snapshot.lastShot, snapshot.focus
+
+    def clone(self, rng=None):
+        """get field with the same ships and shots
+
+        The clone has no watchers and its generator is a copy of the one of
+        the field unless rng is given.
+        """
+        field = self.fromLayout(self.width, self.height, self.layout, self._hidden,
+                                self._cloneRng(rng))
+        field.restore(self.snapshot())
+        return field
+
+    def _cloneRng(self, rng):
+        """get generator of a clone"""
+        return copy(self.rng) if rng is None else makeRandom(rng)
     # end
 
     # render methods
@@ -81,25 +203,59 @@ class Field:
         for rows in zip(*map(cls.__printMap, fields)):
             print(*rows, sep=' '*sepSize)
 
+    def _window(self):
+        """get slices of rows and columns to render
+
+        The window is centred on the focus cell only when the focus leaves it,
+        so successive shots nearby keep the same view.
+        """
+        fy, fx = self.focus or (0, 0)
+        window = self._view
+        if window is None or not (window[0].start <= fy < window[0].stop and
+                                  window[1].start <= fx < window[1].stop):
+            window = self._view = tuple(slice(start, start + view) for start, view in (
+                (min(max(focus - view//2, 0), size - view), view)
+                for focus, size in ((fy, self.height), (fx, self.width))
+                for view in (min(size, self.viewSize),)))
+        return window
+
     def __printMap(self):
         """Additional method to renderParallel"""
-        yield ' '*5 + '   '.join(aUpper[:self.width]) + ' '*2
-        rSep = '   %s' % (u'\u2014'*(self.width*4 + 1))
-        cSep = '|'
-
-        for n, row in enumerate(self, 1):
+        rows, cols = self._window()
+        header, rSep, nWidth = self._mapLayout(rows, cols)
+        yield header
+        for y, row in enumerate(self._charRows(rows, cols), rows.start):
             yield rSep
-            yield f'{n:<3}{cSep:<2}' + ' | '.join(map(str, row)) + f'{cSep:>2}'
+            yield self._mapRow(y, row, nWidth)
         yield rSep
 
+    @staticmethod
+    def _mapLayout(rows, cols):
+        """get (header, row separator, width of row numbers) of the window"""
+        labels = ' '.join(f'{colLabel(x):^3}' for x in range(cols.start, cols.stop))
+        nWidth = max(len(str(rows.stop)) + 1, 3)
+        lWidth = nWidth + (cols.stop - cols.start)*4 + 1
+        header = f'{" "*(nWidth + 1)}{labels}'.rstrip().ljust(lWidth)
+        return header, ' '*nWidth + u'\u2014'*((cols.stop - cols.start)*4 + 1), nWidth
+
+    @staticmethod
+    def _mapRow(y, chars, nWidth):
+        """get rendered row of the field by given cell characters"""
+        cSep = '|'
+        return f'{y + 1:<{nWidth}}{cSep:<2}' + ' | '.join(chars) + f'{cSep:>2}'
+
     def __str__(self) -> str:
         """Shows field"""
-        letters = ' '*5 + '   '.join(aUpper[:self.width])
-        rSep = '\n   %s\n' % (u'\u2014'*(self.width*4 + 1))
-        cSep = '|'
-        field = rSep + rSep.join(f'{n:<3}{cSep:<2}' + ' | '.join(map(str, row)) + f'{cSep:>2}'
-                                 for n, row in enumerate(self, 1)) + rSep
-        return f'{letters}{field}'
+        letters, *rows = self.__printMap()
+        return '\n'.join((letters.rstrip(), *rows)) + '\n'
+
+    def _charRows(self, rows=slice(None), cols=slice(None)):
+        """get rows of the field as cell characters"""
+        return (map(str, row[cols]) for row in self.field[rows])
+
+    def takeDirty(self):
+        """get rows changed since the last call, None if they are not tracked"""
+        return None
     # end
 
     # iter methods
@@ -126,6 +282,10 @@ class Field:
     def removeShip(self, num):
         del self.ships[num]
 
+    def randShip(self, rng=None):
+        """get random ship which is still alive"""
+        return (rng or self.rng).choice(tuple(self.ships.values()))
+
 
 if __name__ == '__main__':
     pass
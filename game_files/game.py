@@ -1,28 +1,46 @@
 from sys import exit
-from time import sleep
+from time import perf_counter
 from weakref import ref
 from re import fullmatch as fmatch
 
 from .field import Field
+from .inputs import TerminalInput
 from .player import Player, PlayerBase, PlayerData
-from .bots import *
+from .pool import FieldPool
+from .probe import probe
 from .settings import Settings
 
 
 class Game:
+    """Terminal game
+
+    NumPy, the bots and the renderer are imported and the bot profiles are
+    opened only when they are needed first, so the sign in prompt comes
+    right after the start.
+    """
     # menu options
-    _mainMenu = ('startGame', 'setSettings', 'about', '_signIn', 'exitGame')
+    _mainMenu = ('startGame', 'setSettings', 'about', '_signIn',
+                 'showPlayerStats', 'exitGame')
     _settingsMenu = ('changeMode', 'setFieldSize',
                      'setPlayerName', 'resetScore')
-    _gameModes = {'easy': EasyBot, 'medium': MediumBot, 'hard': HardBot,
-                  'veryHard': VeryHardBot, 'unreal': UnrealBot}
-
-    def __init__(self) -> None:
+    _gameModes = Player.modes
+
+    def __init__(self, recordFile=None, inputs=None) -> None:
+        # archive the finished games are appended to, see record.GameRecord
+        self.recordFile = recordFile
+        # source of menu choices, names and coords, see inputs.InputSource
+        self.inputs = TerminalInput() if inputs is None else inputs
+        # fields of the next game are made while the player is in the menu
+        self.pool = FieldPool()
         self.drawInfo('Welcome to Space Battle Game' + ' '*41)
         self.players = PlayerData()
-        self.bots = BotData()
-        self._signIn()
-        self.drawMenu()
+        self._bots = self._bot = None
+        try:
+            self._signIn()
+            self.drawMenu()
+        except EOFError:
+            # the input has ended, e.g. a script of moves
+            self.exitGame()
 
     # menu methods
     def drawMenu(self):
@@ -35,9 +53,10 @@ class Game:
                 '2.Settings',
                 '3.About',
                 '4.Change Profile',
-                '5.Exit')
+                '5.Leaderboard',
+                '6.Exit')
             getattr(self, self._mainMenu[int(
-                self.gInput('=> ', r'[1-5]')) - 1])()
+                self.gInput('=> ', r'[1-6]')) - 1])()
 
     def setSettings(self):
         """Settings menu loop"""
@@ -52,7 +71,8 @@ class Game:
             if ch == 4:
                 break
             getattr(self, self._settingsMenu[ch])()
-            sleep(2)
+            self.players.save()
+            self.inputs.pause(2)
     # end
 
     # setUp methods
@@ -66,24 +86,50 @@ class Game:
             self.player: Player = self.players[name]
             self.drawInfo(f'{name} Welcome Back!')
         else:
-            self.player: Player = Player(name)
+            self.player: Player = Player(name, inputs=self.inputs)
             self.players.savePlayer(self.player)
+            self.players.save()
             self.drawInfo(
                 f'{name} seems you are new to this game. We wish you luck!')
-        sleep(2)
+        self.inputs.pause(2)
+
+    @property
+    def bots(self):
+        """get profiles of the bots, they are opened with the first game"""
+        if self._bots is None:
+            from .bots import BotData
+            self._bots = BotData()
+        return self._bots
+
+    @property
+    def bot(self) -> PlayerBase:
+        """get bot of the game mode, it is loaded with the first game"""
+        if self._bot is None:
+            self.__setBot()
+        return self._bot
 
     def __setBot(self):
         """Changes bot Mode"""
+        from .bots import MODES
         gM = self.settings.gameMode
         gM = f'{gM[0].upper()}{gM[1:]}Bot'
         try:
-            self.bot: PlayerBase = self.bots[gM]
+            self._bot = self.bots[gM]
         except Exception:
-            self.bot: PlayerBase = self._gameModes[self.settings.gameMode]()
-            self.bots.savePlayer(self.bot)
+            self._bot = MODES[self.settings.gameMode]()
+            self.bots.savePlayer(self._bot)
+
+    def __prepareFields(self):
+        """Ask the pool for fields of the current settings"""
+        for hidden in self.__hidden():
+            self.pool.prepare(self.settings.fWidth, self.settings.fHeight, hidden)
+
+    def __hidden(self):
+        """get hidden flags of the bot and the player field"""
+        return False, self.player.name != 'LombordTest'
 
     def __setRenderSettings(self):
-        self.mWidth = (self.player.settings.fWidth+1)*4
+        self.mWidth = (min(self.player.settings.fWidth, Field.viewSize)+1)*4
         self.gap = self.mWidth - int(self.mWidth/2.3)
 
     @property
@@ -93,6 +139,7 @@ class Game:
     @player.setter
     def player(self, player):
         self._player = player
+        player.inputs = self.inputs
         self.settings: Settings = self.player.settings
 
     @property
@@ -103,7 +150,8 @@ class Game:
     def settings(self, settings):
         self._settings = ref(settings)
         self.__setRenderSettings()
-        self.__setBot()
+        self.__prepareFields()
+        self._bot = None
 
     def changeMode(self):
         """Changes game Mode"""
@@ -112,10 +160,11 @@ class Game:
                       '2.Medium mode',
                       '3.Hard mode',
                       '4.Very Hard mode',
-                      '5.Unreal mode')
-        self.settings.gameMode = tuple(self._gameModes.keys())[int(
-            self.gInput('=> ', r'[1-5]')) - 1]
-        self.__setBot()
+                      '5.Unreal mode',
+                      '6.Expert mode')
+        self.settings.gameMode = self._gameModes[int(
+            self.gInput('=> ', r'[1-6]')) - 1]
+        self._bot = None
         self.drawInfo('Game Mode has been changed!')
 
     def setFieldSize(self):
@@ -123,11 +172,13 @@ class Game:
         self.drawInfo('Enter Field width and height')
         self.settings.fWidth, self.settings.fHeight = map(
             int, self.gInput('=> ',
-                             r'\s*((?:[1][0-6]|[5-9])\s+(?:[1][0-6]|[5-9]))\s*',
+                             r'\s*((?:1000|[1-9]\d\d|[1-9]\d|[5-9])\s+'
+                             r'(?:1000|[1-9]\d\d|[1-9]\d|[5-9]))\s*',
                              'Incorrect Input! pattern should be [w h] '
-                             'and sizes should be in range (5, 16)',
+                             'and sizes should be in range (5, 1000)',
                              1).split())
         self.__setRenderSettings()
+        self.__prepareFields()
         self.drawInfo('Field size has been changed!')
 
     def setPlayerName(self):
@@ -137,10 +188,11 @@ class Game:
             '=> ',
             r'(?a)[\w]+',
             "Name can contain only English letters, numbers and '_'")
+        self.__prepareFields()
         self.drawInfo('Your name has been changed!')
 
     def resetScore(self):
-        self.player.wins = self.player.losses = 0
+        self.player.resetScores()
         self.drawInfo('Scores have been reseted!')
 
     def about(self):
@@ -148,33 +200,60 @@ class Game:
         pass
 
     def exitGame(self):
+        self.pool.close()
+        self.players.save()
+        if self._bots is not None:
+            self._bots.save()
         self.drawInfo('All changes have been saved!')
         exit(0)
     # end
 
     # GamePlay methods
     def startGame(self):
+        probe.startMatch()
         self.__setUpGame()
 
         self.renderFields()
+        # shots of the player and the bot
+        shots = [0, 0]
         while self.field1 and self.field2:
+            start = perf_counter()
             isHit = self.attacking()
+            shots[self.attacking is self.bot] += 1
+            if probe.enabled:
+                probe.add(f'move/{type(self.attacking).__name__}', perf_counter() - start)
+            self.__recordShot()
             self.showState(isHit)
             isHit or self.__swapPlayers()
         self.drawInfo(
             f'{self.attacking.name} win the game!!!')
-        self.__updateScores()
-        sleep(3)
+        self.__updateScores(shots[self.attacking is self.bot])
+        if self.recordFile:
+            self.recorder.record(int(self.attacking is self.bot)).save(self.recordFile)
+        probe.endMatch()
+        self.inputs.pause(3)
 
     def __setUpGame(self):
-        self.field1: Field = Field(
-            self.settings.fWidth, self.settings.fHeight, False)
-        self.field2: Field = Field(
-            self.settings.fWidth, self.settings.fHeight, self.player.name != 'LombordTest')
+        from .record import Recorder
+        from .render import Renderer
+        self.field1, self.field2 = (
+            self.pool.take(self.settings.fWidth, self.settings.fHeight, hidden)
+            for hidden in self.__hidden())
+        if probe.enabled:
+            for field in (self.field1, self.field2):
+                if field.placeStats is not None:
+                    probe.placement(field.placeStats)
         self.bot.eField = self.field1
         self.player.eField = self.field2
         self.attacking = self.player
         self.defending = self.bot
+        self.renderer = Renderer(self.field1, self.field2)
+        # the player is the player 0 of the record and defends field1
+        self.recorder = Recorder((self.field1, self.field2))
+
+    def __recordShot(self):
+        attacker = int(self.attacking is self.bot)
+        self.recorder.shot(attacker, *self.attacking.eField.lastShot)
 
     def __swapPlayers(self):
         self.attacking, self.defending = self.defending, self.attacking
@@ -183,13 +262,15 @@ class Game:
         self.renderFields()
         self.drawInfo(
             f"{self.attacking.name} {'hit' if isHit else 'miss'}!")
-        if isHit and not isinstance(self.attacking, EasyBot):
+        if isHit and self.attacking is not self.bot:
             return
-        sleep(2)
+        self.inputs.pause(2)
 
-    def __updateScores(self):
-        self.attacking.updateScores(True)
+    def __updateScores(self, shots):
+        self.attacking.updateScores(True, shots)
         self.defending.updateScores(False)
+        self.players.save()
+        self.bots.save()
     # end
 
     # render & input methods
@@ -215,18 +296,26 @@ class Game:
         gap = self.gap if hasattr(self, 'gap') else 41
         # gap=
         prompt = f"{prompt:>{gap + len(prompt)}}"
-        res = fmatch(regex, input(prompt))
+        res = fmatch(regex, self.inputs(prompt))
         while not res:
             self.drawInfo(errorMsg)
-            sleep(1)
-            res = fmatch(regex, input(prompt))
+            self.inputs.pause(1)
+            res = fmatch(regex, self.inputs(prompt))
         return res[group]
 
-    def showPlayerStats(self):
-        pass
+    def showPlayerStats(self, count=10):
+        """Show leaderboard of the current game mode"""
+        self.players.save()
+        mode, name = self.settings.gameMode, self.player.name
+        self.drawInfo(f'Leaderboard of {mode} mode',
+                      *(f'{n}. {player} {score}' for n, (player, score) in
+                        enumerate(self.players.top(mode, count), 1)),
+                      f'{name} is {self.players.rank(mode, name)} of '
+                      f'{self.players.count(mode)} with {getattr(self.player, mode)}')
+        self.inputs.pause(3)
 
     def renderFields(self):
-        Field.renderParallel(self.field1, self.field2)
+        self.renderer.render()
     # end
 
 
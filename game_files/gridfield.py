@@ -0,0 +1,350 @@
+from struct import Struct
+from weakref import ref
+
+from numpy import (arange, array, bincount, broadcast_arrays, flatnonzero, frombuffer,
+                   full, int16, int32, packbits, uint8, unique, unpackbits, where, zeros)
+
+from .field import Field, Snapshot
+from .placement import shipBox
+from .record import SHIP as SHIP_DTYPE, layoutArray
+
+# cell states, the low bits hold the kind of the cell and the high bits its visibility
+EMPTY, BORDER, SHIP = 0, 1, 2
+OPENED, REVEALED = 4, 8
+# width, height and count of the ships of a packed field
+PACK = Struct('<HHI')
+
+
+def _cellChar(state, hidden):
+    """Get character of the cell by given state"""
+    if state & OPENED:
+        if state & SHIP:
+            return 'X'
+        return '*' if state & REVEALED else u"·"
+    if state & SHIP and not hidden:
+        return u'▨'
+    return ' '
+
+
+_CHARS = {hidden: array([_cellChar(state, hidden) for state in range(16)])
+          for hidden in (False, True)}
+
+
+class GridCell:
+    """Cell view over the grids of GridField, created on demand"""
+    __slots__ = ('_field', 'y', 'x')
+
+    def __init__(self, field, y, x) -> None:
+        self._field = field
+        self.y, self.x = y, x
+
+    def open(self):
+        return self._field.open(self.y, self.x)
+
+    def isOpened(self):
+        return bool(self._field.state[self.y, self.x] & OPENED)
+
+    @property
+    def opened(self):
+        return self.isOpened()
+
+    @property
+    def ship(self):
+        return self._field.shipAt(self.y, self.x)
+
+    @property
+    def number(self):
+        ship = self.ship
+        return self.y - ship.y if ship.isVertical else self.x - ship.x
+
+    def __bool__(self) -> bool:
+        return bool(self._field.state[self.y, self.x] & (BORDER | SHIP))
+
+    def __repr__(self) -> str:
+        return _CHARS[self._field._hidden][self._field.state[self.y, self.x]]
+
+
+class GridShip:
+    """Ship of GridField, its cells live in the grids of the field"""
+    __slots__ = ('x', 'y', 'isVertical', 'size', 'num', '_field', 'botRef')
+
+    def __init__(self, x, y, isVertical, size, field, num) -> None:
+        self.x, self.y = x, y
+        self.size = size
+        self.isVertical = isVertical
+        self._field = ref(field)
+        self.num = num
+        self.botRef = None
+
+    @property
+    def field(self):
+        return self._field()
+
+    def span(self):
+        """get slices of the ship cells"""
+        if self.isVertical:
+            return slice(self.y, self.y + self.size), self.x
+        return self.y, slice(self.x, self.x + self.size)
+
+    def box(self):
+        """get slices of the ship with its borders"""
+        field = self.field
+        yStart, yEnd, xStart, xEnd = shipBox(self.x, self.y, self.isVertical,
+                                             self.size, field.width, field.height)
+        return slice(yStart, yEnd), slice(xStart, xEnd)
+
+    def cells(self):
+        """get coordinates of the ship cells"""
+        if self.isVertical:
+            return [(y, self.x) for y in range(self.y, self.y + self.size)]
+        return [(self.y, x) for x in range(self.x, self.x + self.size)]
+
+    @property
+    def shipCells(self):
+        field = self.field
+        return {num: GridCell(field, y, x)
+                for num, (y, x) in enumerate(self.cells())
+                if not field.state[y, x] & OPENED}
+
+    def checkAlive(self, number=None):
+        if not self:
+            self.revealAll()
+            self.field.removeShip(self.num)
+            self.callBot()
+
+    def revealAll(self):
+        field = self.field
+        rows, cols = self.box()
+        box = field.state[rows, cols]
+        if field._watchers:
+            # the box is small, so the cells are listed without NumPy
+            width = field.width
+            opened = [y*width + x for y, row in enumerate((box & (SHIP | OPENED)).tolist(),
+                                                          rows.start)
+                      for x, state in enumerate(row, cols.start) if not state]
+        box[box & SHIP == 0] |= OPENED | REVEALED
+        field._dirty.update(range(rows.start, rows.stop))
+        if field._watchers:
+            field._notify(opened)
+
+    def addBotRef(self, bot):
+        self.botRef = ref(bot)
+
+    def callBot(self):
+        if self.botRef:
+            self.botRef().removeShip(self)
+
+    def __bool__(self):
+        return self.field._hits[self.num] > 0
+
+
+class GridField(Field):
+    """Field which keeps states of the cells and ship ids in NumPy grids
+
+    Cell objects are created only on access, so a field costs three bytes per
+    cell instead of a Python object per cell.
+    """
+
+    # initialization methods
+    def _fillField(self):
+        """Fill the grids with empty cells"""
+        self.state = zeros((self.height, self.width), uint8)
+        self.shipIds = full((self.height, self.width), -1,
+                            int16 if len(self._sizes) < 2**15 else int32)
+        self._hits = []
+        self._fleet = []
+        self._alive = []
+        self._alivePos = []
+        self.ships = {}
+        self.lastShot = None
+        self._dirty = set()
+    # end
+
+    # gen methods
+    def genShips(self, layout=None):
+        super().genShips(layout)
+        # the ship ids are shared by the clones, shots never change them
+        self.shipIds.flags.writeable = False
+
+    def _addShip(self, x, y, isVert, size, n):
+        """Put ship on the grids"""
+        ship = GridShip(x, y, isVert, size, self, n)
+        box = self.state[ship.box()]
+        box[box == EMPTY] = BORDER
+        span = ship.span()
+        self.state[span] = SHIP
+        self.shipIds[span] = n
+        self._hits.append(size)
+        self._fleet.append(ship)
+        self._alivePos.append(len(self._alive))
+        self._alive.append(n)
+        self.ships[n] = ship
+        return ship
+    # end
+
+    # shot methods
+    def open(self, y, x):
+        """Open cell by given coords, returns True if a ship has been hit"""
+        self.lastShot = self.focus = y, x
+        state = self.state[y, x]
+        if state & OPENED:
+            return bool(state & SHIP)
+        self.state[y, x] = state | OPENED
+        self._dirty.add(y)
+        if not state & SHIP:
+            return False
+        n = self.shipIds[y, x]
+        self._hits[n] -= 1
+        self._fleet[n].checkAlive()
+        return True
+
+    def openMany(self, cells):
+        """Open cells by given flat indexes at once, sunk ships are revealed"""
+        state = self.state.reshape(-1)
+        cells = unique(cells)
+        cells = cells[state[cells] & OPENED == 0]
+        if not len(cells):
+            return
+        state[cells] |= OPENED
+        self._dirty.update((cells // self.width).tolist())
+        if self._watchers:
+            self._notify(cells.tolist())
+        ids = self.shipIds.reshape(-1)[cells]
+        hits = bincount(ids[ids >= 0], minlength=len(self._hits))
+        sunk = []
+        for n in flatnonzero(hits).tolist():
+            self._hits[n] -= int(hits[n])
+            if not self._hits[n]:
+                sunk.append(n)
+        if sunk:
+            self.__revealMany(sunk)
+        for n in sunk:
+            self.removeShip(n)
+            self._fleet[n].callBot()
+
+    def __revealMany(self, nums):
+        """Open borders of given sunk ships at once"""
+        x, y, isVertical, size = array([self.layout[n] for n in nums]).T
+        yEnd, xEnd = y + where(isVertical, size, 1), x + where(isVertical, 1, size)
+        offsets = arange(size.max() + 2) - 1
+        ys, xs = broadcast_arrays(y[:, None, None] + offsets[:, None],
+                                  x[:, None, None] + offsets)
+        inBox = (ys >= 0) & (ys <= yEnd[:, None, None]) & (ys < self.height) & \
+            (xs >= 0) & (xs <= xEnd[:, None, None]) & (xs < self.width)
+        cells = ys[inBox] * self.width + xs[inBox]
+        state = self.state.reshape(-1)
+        cells = cells[state[cells] & SHIP == 0]
+        if self._watchers:
+            opened = cells[state[cells] & OPENED == 0].tolist()
+        state[cells] |= OPENED | REVEALED
+        self._dirty.update((cells // self.width).tolist())
+        if self._watchers:
+            self._notify(opened)
+
+    def removeShip(self, num):
+        super().removeShip(num)
+        pos, last = self._alivePos[num], self._alive.pop()
+        if last != num:
+            self._alive[pos] = last
+            self._alivePos[last] = pos
+
+    def randShip(self, rng=None):
+        """get random ship which is still alive"""
+        return self._fleet[self._alive[(rng or self.rng).randrange(len(self._alive))]]
+
+    def shipAt(self, y, x):
+        """get ship by given coords"""
+        n = self.shipIds[y, x]
+        return None if n < 0 else self._fleet[n]
+
+    def openedCells(self):
+        """get flat indexes of the opened cells"""
+        return flatnonzero(self.state & OPENED).tolist()
+    # end
+
+    # render methods
+    def _charRows(self, rows=slice(None), cols=slice(None)):
+        """get rows of the field as cell characters"""
+        return (row.tolist() for row in _CHARS[self._hidden][self.state[rows, cols]])
+
+    def takeDirty(self):
+        """get rows changed since the last call"""
+        dirty, self._dirty = self._dirty, set()
+        return dirty
+    # end
+
+    # pack methods
+    def pack(self) -> bytes:
+        """get compact bytes of the field: size, layout and bits of the opened cells"""
+        layout = layoutArray(self.layout)
+        return b''.join((PACK.pack(self.width, self.height, len(layout)), layout.tobytes(),
+                         packbits(self.state & OPENED != 0).tobytes()))
+
+    @classmethod
+    def unpack(cls, data, hidden=True):
+        """Create field by given bytes of pack, borders of sunk ships are revealed again"""
+        width, height, ships = PACK.unpack_from(data)
+        layout = frombuffer(data, SHIP_DTYPE, ships, PACK.size)
+        offset = PACK.size + layout.nbytes
+        field = cls.fromLayout(width, height, layout.tolist(), hidden)
+        field.openMany(flatnonzero(unpackbits(frombuffer(data, uint8, offset=offset),
+                                              count=width * height)))
+        return field
+    # end
+
+    # snapshot methods
+    def snapshot(self) -> Snapshot:
+        """get state of the shots: a byte per cell and the hits of the ships"""
+        return Snapshot(self.state.copy(), tuple(self._hits), tuple(self._alive),
+                        self.lastShot, self.focus)
+
+    def restore(self, snapshot):
+        """Put back state of the shots saved by snapshot of the field or its clone"""
+        self.state[...] = snapshot.cells
+        self._hits[:] = snapshot.hits
+        self._alive[:] = snapshot.alive
+        for pos, n in enumerate(self._alive):
+            self._alivePos[n] = pos
+        self.ships = {n: self._fleet[n] for n in sorted(self._alive)}
+        self.lastShot, self.focus = snapshot.lastShot, snapshot.focus
+        self._dirty.update(range(self.height))
+
+    def clone(self, rng=None):
+        """get field with the same ships and shots
+
+        The clone shares the layout and the read-only ship ids of the field,
+        it copies only the grid of the states and makes its own light ships,
+        so no placement is repeated.
+        """
+        field = object.__new__(type(self))
+        field.__dict__.update(self.__dict__)
+        field.rng = self._cloneRng(rng)
+        field.state = self.state.copy()
+        field._hits, field._alive = self._hits.copy(), self._alive.copy()
+        field._alivePos = self._alivePos.copy()
+        field._fleet = [GridShip(*ship, field, n) for n, ship in enumerate(self.layout)]
+        field.ships = {n: field._fleet[n] for n in self.ships}
+        field._watchers, field._dirty, field._view = [], set(), None
+        return field
+    # end
+
+    # iter methods
+    def __iter__(self):
+        """get iterator of the field"""
+        return ([GridCell(self, y, x) for x in range(self.width)]
+                for y in range(self.height))
+
+    def __getitem__(self, cords) -> GridCell:
+        """get cell by given coords"""
+        y, x = cords
+        if not (-self.height <= y < self.height and -self.width <= x < self.width):
+            raise IndexError('coords are out of the field')
+        return GridCell(self, y % self.height, x % self.width)
+
+    def __len__(self) -> int:
+        return self.height
+    # end
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,110 @@
+from collections import Counter
+
+from numpy import arange, int8, int64, maximum, minimum, where, zeros
+
+from .placement import freeWindows, shipBox, windowSums
+
+# what is known about the cell
+UNKNOWN, MISS, HIT, BLOCKED = 0, 1, 2, 3
+
+
+def spread(weights, size, width):
+    """get sum of weights of the windows covering every cell of the rows"""
+    height, count = weights.shape
+    if not count:
+        return zeros((height, width), int64)
+    sums = zeros((height, count + 1), int64)
+    weights.cumsum(1, out=sums[:, 1:])
+    cells = arange(width)
+    return sums[:, minimum(cells, count - 1) + 1] - sums[:, maximum(cells - size + 1, 0)]
+
+
+class Heatmap:
+    """Probability density of ship cells over the observed field
+
+    Every cell gets the count of placements of the remaining fleet covering it
+    which do not cross misses and revealed cells, placements through not sunk
+    hits are counted hitWeight times more for every hit. Horizontal density is
+    kept per row and vertical per column, so a shot recounts only its row and
+    column.
+    """
+    hitWeight = 32
+
+    def __init__(self, width, height, sizes) -> None:
+        self.width = width
+        self.height = height
+        self.known = zeros((height, width), int8)
+        self.fleet = Counter(sizes)
+        self.__recount()
+
+    # density methods
+    def __lineDensity(self, known):
+        """get density of placements along the rows of given known cells"""
+        blocked = (known == MISS) | (known == BLOCKED)
+        hits = known == HIT
+        density = zeros(known.shape, int64)
+        for size, count in self._weights.items():
+            weights = freeWindows(blocked, size) * \
+                (1 + self.hitWeight * windowSums(hits, size, int64))
+            density += count * spread(weights, size, known.shape[1])
+        return density
+
+    def __recount(self):
+        """Count the whole field with the current fleet"""
+        self._weights = {size: count for size, count in self.fleet.items() if count}
+        self.hDensity = self.__lineDensity(self.known)
+        self.vDensity = self.__lineDensity(self.known.T).T
+        self.score = self.hDensity + self.vDensity
+
+    def update(self, rows, cols):
+        """Recount densities of given row and column slices"""
+        density = self.__lineDensity(self.known[rows])
+        self.score[rows] += density - self.hDensity[rows]
+        self.hDensity[rows] = density
+        density = self.__lineDensity(self.known[:, cols].T).T
+        self.score[:, cols] += density - self.vDensity[:, cols]
+        self.vDensity[:, cols] = density
+
+    def best(self):
+        """get (y, x) of not opened cell with the highest density"""
+        y, x = divmod(int(where(self.known == UNKNOWN, self.score, -1).argmax()),
+                      self.width)
+        return y, x
+    # end
+
+    # observe methods
+    def observe(self, y, x, isHit):
+        """Mark result of the shot"""
+        self.known[y, x] = HIT if isHit else MISS
+        self.update(slice(y, y + 1), slice(x, x + 1))
+
+    def load(self, opened, hits, sunk):
+        """Mark all results at once by given masks of the opened and the hit
+        cells and sunk ships [(x, y, isVertical, size)]"""
+        self.known[opened] = MISS
+        self.known[hits] = HIT
+        for x, y, isVertical, size in sunk:
+            yStart, yEnd, xStart, xEnd = shipBox(x, y, isVertical, size,
+                                                 self.width, self.height)
+            self.known[yStart:yEnd, xStart:xEnd] = BLOCKED
+            self.fleet[size] -= 1
+        self.__recount()
+
+    def sink(self, x, y, isVertical, size):
+        """Mark sunk ship and its revealed borders"""
+        yStart, yEnd, xStart, xEnd = shipBox(x, y, isVertical, size,
+                                             self.width, self.height)
+        rows, cols = slice(yStart, yEnd), slice(xStart, xEnd)
+        self.known[rows, cols] = BLOCKED
+        self.fleet[size] -= 1
+        # weights are refreshed only when a size is over or halved,
+        # otherwise the counts stay consistent with the kept densities
+        if not self.fleet[size] or self.fleet[size]*2 <= self._weights[size]:
+            self.__recount()
+        else:
+            self.update(rows, cols)
+    # end
+
+
+if __name__ == '__main__':
+    pass
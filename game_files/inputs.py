@@ -0,0 +1,94 @@
+import sys
+from time import sleep
+
+
+class InputSource:
+    """Source of the lines typed by the player
+
+    Menus, sign in and shots read lines through a source. Pauses which let
+    a human read the messages are made only by interactive sources, so
+    scripted sessions run at full speed. The end of the input raises
+    EOFError like input does. The source reads lines by given callable
+    taking the prompt, subclasses override __call__.
+    """
+    interactive = True
+
+    def __init__(self, read=input) -> None:
+        self.read = read
+
+    def __call__(self, prompt='') -> str:
+        return self.read(prompt)
+
+    def pause(self, seconds):
+        """Wait for the player to read the message"""
+        if self.interactive:
+            sleep(seconds)
+
+
+class TerminalInput(InputSource):
+    """Lines typed in the terminal, input is looked up on every line"""
+
+    def __call__(self, prompt='') -> str:
+        return input(prompt)
+
+
+class ScriptInput(InputSource):
+    """Lines of a list or any other iterable, echo prints them as typed"""
+    interactive = False
+
+    def __init__(self, lines, echo=False) -> None:
+        self._lines = iter(lines)
+        self.echo = echo
+
+    def __call__(self, prompt='') -> str:
+        line = next(self._lines, None)
+        if line is None:
+            raise EOFError
+        if self.echo:
+            print(prompt, line, sep='')
+        return line
+
+
+class StreamInput(ScriptInput):
+    """Lines of a text file or stdin, pauses are made only for a terminal"""
+
+    def __init__(self, stream=None, echo=False) -> None:
+        self.stream = sys.stdin if stream is None else stream
+        super().__init__((line.rstrip('\r\n') for line in self.stream), echo)
+        self.interactive = self.stream.isatty()
+
+
+class QueueInput(InputSource):
+    """Lines put to an asyncio queue
+
+    The game reads the queue from its own thread while the event loop puts
+    the lines, coroutines may await get instead. None put to the queue ends
+    the input.
+    """
+    interactive = False
+
+    def __init__(self, queue=None, loop=None) -> None:
+        import asyncio
+        self.loop = loop if loop is not None else asyncio.get_running_loop()
+        self.queue = queue if queue is not None else asyncio.Queue()
+
+    def __call__(self, prompt='') -> str:
+        from asyncio import run_coroutine_threadsafe
+        return self._check(run_coroutine_threadsafe(self.queue.get(), self.loop).result())
+
+    async def get(self, prompt=''):
+        return self._check(await self.queue.get())
+
+    def put(self, line):
+        """Put the line from any thread, None ends the input"""
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, line)
+
+    @staticmethod
+    def _check(line):
+        if line is None:
+            raise EOFError
+        return line
+
+
+if __name__ == '__main__':
+    pass
@@ -1,35 +1,327 @@
 import json
+import os
+import sqlite3
+from time import perf_counter
+
+from .leaderboard import Leaderboard
+from .probe import probe
+
+
+class JSONStore:
+    """Profiles kept in one JSON file, the whole file is written on save
+
+    The leaderboard is kept in memory and is built by the database when the
+    file is opened.
+    """
+
+    def __init__(self, fileName) -> None:
+        self.fileName = fileName
+        self._data = None
+        self.board = Leaderboard()
+        self.indexed = False
+
+    @property
+    def data(self):
+        if self._data is None:
+            try:
+                with open(self.fileName, 'r', encoding='utf-8') as pFile:
+                    self._data = json.load(pFile)
+            except (OSError, ValueError):
+                self._data = {}
+        return self._data
+
+    def get(self, name):
+        """get data of the profile by given name or None"""
+        return self.data.get(name)
+
+    def __contains__(self, name):
+        return name in self.data
+
+    def names(self):
+        return list(self.data)
+
+    def items(self):
+        """get iterator of (name, data) of all profiles"""
+        return iter(list(self.data.items()))
+
+    def write(self, rows, removed=(), scores=None):
+        """Save profiles by given {name: json text} and delete removed names,
+        scores are given as {name: {mode: score}}"""
+        data = self.data
+        for name in removed:
+            data.pop(name, None)
+            self.board.remove(name)
+        data.update((name, json.loads(text)) for name, text in rows.items())
+        with open(self.fileName, 'w', encoding='utf-8') as pFile:
+            json.dump(data, pFile, indent=4)
+        self.writeScores(scores or {})
+
+    def writeScores(self, scores):
+        """Update leaderboard by given {name: {mode: score}}"""
+        for name, modes in scores.items():
+            self.board.update(name, modes)
+
+    def top(self, mode, count=10):
+        return self.board.top(mode, count)
+
+    def rank(self, mode, name):
+        return self.board.rank(mode, name)
+
+    def count(self, mode):
+        return self.board.count(mode)
+
+    def close(self):
+        pass
+
+
+class SQLiteStore:
+    """Profiles kept in a SQLite table, one row per profile
+
+    Only the asked profile is read and a save writes the given rows in one
+    transaction, so both do not depend on the count of the profiles. Scores
+    are kept in a second table indexed by (mode, score) for the leaderboard,
+    triggers keep count of the players per (mode, score) in a third one, so a
+    rank sums the counts of the higher scores instead of walking the players
+    above.
+    """
+    indexed = True
+
+    def __init__(self, fileName, table='profiles') -> None:
+        self.fileName = fileName
+        self.table = table
+        self._conn = sqlite3.connect(fileName)
+        with self._conn:
+            self._conn.execute(f'CREATE TABLE IF NOT EXISTS {table} '
+                               '(name TEXT PRIMARY KEY, data TEXT NOT NULL)')
+            self._conn.execute(f'CREATE TABLE IF NOT EXISTS {table}_scores '
+                               '(mode TEXT, name TEXT, score INTEGER NOT NULL, '
+                               'PRIMARY KEY (mode, name))')
+            self._conn.execute(f'CREATE INDEX IF NOT EXISTS {table}_rank '
+                               f'ON {table}_scores (mode, score DESC, name)')
+            self.__createCounts()
+
+    def __createCounts(self):
+        """Create table of the counts per (mode, score) and its triggers"""
+        table = self.table
+        isNew = self._conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                                   'AND name = ?', (f'{table}_counts',)).fetchone() is None
+        self._conn.execute(f'CREATE TABLE IF NOT EXISTS {table}_counts '
+                           '(mode TEXT, score INTEGER, count INTEGER NOT NULL, '
+                           'PRIMARY KEY (mode, score)) WITHOUT ROWID')
+        # a conflict clause in a trigger is overridden by the one of the upsert
+        add = (f'INSERT INTO {table}_counts SELECT NEW.mode, NEW.score, 0 WHERE NOT EXISTS '
+               f'(SELECT 1 FROM {table}_counts WHERE mode = NEW.mode AND score = NEW.score); '
+               f'UPDATE {table}_counts SET count = count + 1 '
+               'WHERE mode = NEW.mode AND score = NEW.score;')
+        remove = (f'UPDATE {table}_counts SET count = count - 1 '
+                  'WHERE mode = OLD.mode AND score = OLD.score; '
+                  f'DELETE FROM {table}_counts '
+                  'WHERE mode = OLD.mode AND score = OLD.score AND count = 0;')
+        for name, event, body in (('add', 'INSERT', add), ('remove', 'DELETE', remove),
+                                  ('change', 'UPDATE OF mode, score', remove + add)):
+            self._conn.execute(f'CREATE TRIGGER IF NOT EXISTS {table}_counts_{name} '
+                               f'AFTER {event} ON {table}_scores BEGIN {body} END')
+        if isNew:
+            self._conn.execute(f'INSERT INTO {table}_counts SELECT mode, score, COUNT(*) '
+                               f'FROM {table}_scores GROUP BY mode, score')
+
+    def get(self, name):
+        """get data of the profile by given name or None"""
+        row = self._conn.execute(f'SELECT data FROM {self.table} WHERE name = ?',
+                                 (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def __contains__(self, name):
+        return self._conn.execute(f'SELECT 1 FROM {self.table} WHERE name = ?',
+                                  (name,)).fetchone() is not None
+
+    def names(self):
+        return [name for name, in self._conn.execute(f'SELECT name FROM {self.table}')]
+
+    def items(self):
+        """get iterator of (name, data) of all profiles"""
+        return ((name, json.loads(data)) for name, data in
+                self._conn.execute(f'SELECT name, data FROM {self.table}').fetchall())
+
+    def write(self, rows, removed=(), scores=None):
+        """Save profiles by given {name: json text} and delete removed names,
+        scores are given as {name: {mode: score}}"""
+        with self._conn:
+            for table in (self.table, f'{self.table}_scores'):
+                self._conn.executemany(f'DELETE FROM {table} WHERE name = ?',
+                                       ((name,) for name in removed))
+            self._conn.executemany(
+                f'INSERT OR REPLACE INTO {self.table} (name, data) VALUES (?, ?)',
+                rows.items())
+            self.writeScores(scores or {})
+
+    def writeScores(self, scores):
+        """Update leaderboard by given {name: {mode: score}}"""
+        with self._conn:
+            # an upsert fires the update trigger, a replace would not fire the delete one
+            self._conn.executemany(
+                f'INSERT INTO {self.table}_scores (mode, name, score) VALUES (?, ?, ?) '
+                'ON CONFLICT (mode, name) DO UPDATE SET score = excluded.score',
+                ((mode, name, score) for name, modes in scores.items()
+                 for mode, score in modes.items()))
+
+    def top(self, mode, count=10):
+        """get [(name, score)] of the best players of the mode"""
+        return self._conn.execute(
+            f'SELECT name, score FROM {self.table}_scores WHERE mode = ? '
+            'ORDER BY score DESC, name LIMIT ?', (mode, count)).fetchall()
+
+    def rank(self, mode, name):
+        """get place of the player in the mode starting from 1 or None"""
+        row = self._conn.execute(
+            f'SELECT score FROM {self.table}_scores WHERE mode = ? AND name = ?',
+            (mode, name)).fetchone()
+        if row is None:
+            return None
+        # players of the same score are ordered by name
+        return self._conn.execute(
+            f'SELECT (SELECT COALESCE(SUM(count), 0) FROM {self.table}_counts '
+            'WHERE mode = ? AND score > ?) + '
+            f'(SELECT COUNT(*) FROM {self.table}_scores WHERE mode = ? AND score = ? '
+            'AND name < ?)', (mode, row[0], mode, row[0], name)).fetchone()[0] + 1
+
+    def count(self, mode):
+        """get count of the players in the mode"""
+        return self._conn.execute(
+            f'SELECT COALESCE(SUM(count), 0) FROM {self.table}_counts WHERE mode = ?',
+            (mode,)).fetchone()[0]
+
+    def migrate(self, jsonFile):
+        """Import profiles of the JSON file which are not in the table yet,
+        returns count of the imported profiles"""
+        data = JSONStore(jsonFile).data
+        with self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                f'INSERT OR IGNORE INTO {self.table} (name, data) VALUES (?, ?)',
+                ((name, json.dumps(profile)) for name, profile in data.items()))
+            return self._conn.total_changes - before
+
+    def close(self):
+        self._conn.close()
 
 
 class DataBase:
+    """Profiles loaded from the store on demand
+
+    Saved json text of every loaded profile is kept, so a save writes only
+    the profiles which have been changed since they were loaded or saved.
+    By default profiles are kept in SQLite next to the JSON file, the JSON
+    file is imported when the SQLite file is created.
+    """
     _fileName = ''
 
-    def __init__(self) -> None:
+    def __init__(self, store=None) -> None:
         self.players = {}
-        self.loadPlayers()
+        self._saved = {}
+        self._store = store
 
-    def loadPlayers(self):
-        pass
+    @property
+    def store(self):
+        """get the store, the default one is opened on the first access"""
+        if self._store is None:
+            self._store = self._openStore()
+        if not self._store.indexed:
+            self.reindex()
+        return self._store
+
+    def _openStore(self):
+        """Open the default SQLite store"""
+        dbName = os.path.splitext(self._fileName)[0] + '.sqlite3'
+        isNew = not os.path.exists(dbName)
+        store = SQLiteStore(dbName)
+        if isNew and os.path.exists(self._fileName):
+            store.migrate(self._fileName)
+            store.indexed = False
+        return store
+
+    def _makePlayer(self, name, data):
+        """get profile object by given name and stored data, a Player by default"""
+        # player imports this module
+        from .player import Player
+        return Player(name=name, **data)
+
+    def _scores(self, player):
+        """get {mode: score} of the profile for the leaderboard"""
+        return {}
+
+    def reindex(self):
+        """Build the leaderboard from all stored profiles"""
+        store = self._store if self._store is not None else self.store
+        store.writeScores({name: self._scores(self._makePlayer(name, data))
+                           for name, data in store.items()})
+        store.indexed = True
+
+    def dirty(self):
+        """get {name: json text} of the changed profiles"""
+        rows = {}
+        for player in self.players.values():
+            text = json.dumps(player.toJS())
+            if self._saved.get(str(player)) != text:
+                rows[str(player)] = text
+        return rows
+
+    def save(self):
+        """Write changed profiles in one batch"""
+        start = perf_counter()
+        # renamed profiles are stored under the new name
+        removed = [key for key, player in self.players.items() if key != str(player)]
+        for key in removed:
+            player = self.players.pop(key)
+            self._saved.pop(key, None)
+            self.players[str(player)] = player
+        rows = self.dirty()
+        if rows or removed:
+            self.store.write(rows, removed, {name: self._scores(self.players[name])
+                                             for name in rows})
+            self._saved.update(rows)
+        if probe.enabled:
+            probe.add('db/save', perf_counter() - start)
+
+    # leaderboard methods
+    def top(self, mode, count=10):
+        """get [(name, score)] of the best saved profiles of the mode"""
+        return self.store.top(mode, count)
+
+    def rank(self, mode, name):
+        """get place of the saved profile in the mode starting from 1 or None"""
+        return self.store.rank(mode, name)
 
-    def __savePlayers(self):
-        with open(self._fileName, 'w', encoding='utf-8') as pFile:
-            json.dump({player.name: player.toJS()
-                      for player in self.players.values()}, pFile, indent=4)
+    def count(self, mode):
+        """get count of the saved profiles in the mode"""
+        return self.store.count(mode)
+    # end
 
     def savePlayer(self, player):
         self.players[str(player)] = player
 
     def __getitem__(self, key):
+        if key not in self.players:
+            start = perf_counter()
+            data = self.store.get(key)
+            if data is None:
+                raise KeyError(key)
+            player = self.players[key] = self._makePlayer(key, data)
+            self._saved[key] = json.dumps(player.toJS())
+            if probe.enabled:
+                probe.add('db/load', perf_counter() - start)
         return self.players[key]
 
     def __setitem__(self, key, val):
         self.players[key] = val
 
     def __del__(self):
-        self.__savePlayers()
+        self.save()
+        if self._store is not None:
+            self._store.close()
 
     def __contains__(self, key):
-        return key in self.players
+        return key in self.players or key in self.store
 
 
 if __name__ == '__main__':
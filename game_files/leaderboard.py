@@ -0,0 +1,51 @@
+from bisect import bisect_left as bLeft, insort
+
+
+class Leaderboard:
+    """Scores of the players sorted per game mode
+
+    Every mode keeps a sorted list of (-score, name), so an update, the top
+    and the rank of a player are found by bisection.
+    """
+
+    def __init__(self) -> None:
+        self._ranks = {}
+        self._scores = {}
+
+    def update(self, name, scores):
+        """Set scores of the player by given {mode: score}"""
+        for mode, score in scores.items():
+            ranks = self._ranks.setdefault(mode, [])
+            old = self._scores.get((mode, name))
+            if old == score:
+                continue
+            if old is not None:
+                del ranks[bLeft(ranks, (-old, name))]
+            insort(ranks, (-score, name))
+            self._scores[mode, name] = score
+
+    def remove(self, name):
+        """Remove the player from all modes"""
+        for mode, ranks in self._ranks.items():
+            score = self._scores.pop((mode, name), None)
+            if score is not None:
+                del ranks[bLeft(ranks, (-score, name))]
+
+    def top(self, mode, count=10):
+        """get [(name, score)] of the best players of the mode"""
+        return [(name, -score) for score, name in self._ranks.get(mode, [])[:count]]
+
+    def rank(self, mode, name):
+        """get place of the player in the mode starting from 1 or None"""
+        score = self._scores.get((mode, name))
+        if score is None:
+            return None
+        return bLeft(self._ranks[mode], (-score, name)) + 1
+
+    def count(self, mode):
+        """get count of the players in the mode"""
+        return len(self._ranks.get(mode, ()))
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,88 @@
+from typing import NamedTuple
+
+from .gridfield import GridField
+from .player import PlayerBase
+from .record import GameRecord, Recorder
+from .rng import streams
+
+
+class Turn(NamedTuple):
+    player: int
+    y: int
+    x: int
+    hit: bool
+
+
+class MatchResult(NamedTuple):
+    winner: PlayerBase
+    loser: PlayerBase
+    shots: int
+    turns: list
+    record: GameRecord = None
+    # shots of the players in the order they have been given
+    playerShots: tuple = (0, 0)
+
+
+class Match:
+    """Headless match between two players
+
+    Runs the same turn loop as Game.startGame without input, output or
+    delays. Player at index 0 shoots first. With record the result gets
+    the binary GameRecord of the match. A seed (int or SeedSequence) gives
+    independent generators to both fields and both players, so the match
+    is played the same way every time.
+    """
+
+    def __init__(self, player1, player2, width=12, height=12,
+                 maxSize=None, log=True, record=False, seed=None) -> None:
+        self.players = (player1, player2)
+        self.width = width
+        self.height = height
+        self.maxSize = maxSize
+        self.log = log
+        self.record = record
+        self.seed = seed
+
+    def setUp(self):
+        """Create fields and give them to the players"""
+        rngs = (None,)*4 if self.seed is None else streams(self.seed, 4)
+        self.fields = tuple(GridField(self.width, self.height, hidden, self.maxSize, rng=rng)
+                            for hidden, rng in zip((False, True), rngs))
+        for player, rng in zip(self.players, rngs[2:]):
+            if rng is not None and hasattr(player, 'rng'):
+                player.rng = rng
+        self.players[0].eField = self.fields[1]
+        self.players[1].eField = self.fields[0]
+
+    def play(self) -> MatchResult:
+        """Play the match to the end"""
+        self.setUp()
+        players, fields = self.players, self.fields
+        targets = fields[::-1]
+        turns = [] if self.log else None
+        recorder = Recorder(fields, self.seed if isinstance(self.seed, int) else None) \
+            if self.record else None
+        attacking = shots = 0
+        playerShots = [0, 0]
+        while fields[0] and fields[1]:
+            isHit = players[attacking]()
+            shots += 1
+            playerShots[attacking] += 1
+            if turns is not None:
+                turns.append(Turn(attacking, *targets[attacking].lastShot, isHit))
+            if recorder is not None:
+                recorder.shot(attacking, *targets[attacking].lastShot)
+            if not isHit:
+                attacking ^= 1
+        return MatchResult(players[attacking], players[attacking ^ 1], shots, turns,
+                           recorder and recorder.record(attacking), tuple(playerShots))
+
+
+def playMatch(player1, player2, width=12, height=12, maxSize=None, log=True,
+              record=False, seed=None):
+    """Play headless match between given players"""
+    return Match(player1, player2, width, height, maxSize, log, record, seed).play()
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,73 @@
+from time import perf_counter
+
+from numpy import argwhere, int64, zeros
+
+from .heatmap import BLOCKED, HIT, MISS
+from .placement import Placement
+from .rng import makeRandom
+from .tables import tables
+
+
+def sampleLayout(known, sizes, rng=None):
+    """get random layout of the ships consistent with known cells or None
+
+    Not sunk hits are covered first by ships placed through them, which are
+    looked up in the placement tables, the rest of the fleet is placed on
+    cells which are neither missed nor revealed.
+    """
+    rng = makeRandom(rng)
+    height, width = known.shape
+    placement = Placement(width, height, rng=rng)
+    placement.cover[(known == MISS) | (known == BLOCKED)] = 1
+    cover = placement.cover.reshape(-1)
+    covered = zeros(known.shape, bool)
+    sizes = list(sizes)
+    hits = argwhere(known == HIT).tolist()
+    rng.shuffle(hits)
+    for hy, hx in hits:
+        if covered[hy, hx]:
+            continue
+        spots = []
+        for size in set(sizes):
+            table = tables.get(width, height, size)
+            through = table.through(hy * width + hx)
+            through = through[~cover[table.footprint[through]].any(1)]
+            spots += ((table, n) for n in through.tolist())
+        if not spots:
+            return None
+        table, n = spots[rng.randrange(len(spots))]
+        (x, y, isVert), size = table.spots[n].tolist(), table.size
+        placement.place(x, y, isVert, size)
+        covered[(slice(y, y + size), x) if isVert else (y, slice(x, x + size))] = True
+        sizes.remove(size)
+    for size in sorted(sizes, reverse=True):
+        spot = placement.sample(size)
+        if spot is None:
+            return None
+        placement.place(*spot, size)
+    return placement.placed
+
+
+def sampleCounts(known, sizes, budget, seed=None):
+    """Sample layouts until the budget in seconds runs out
+
+    Returns counts of ships over the cells, count of the samples and
+    the seconds spent.
+    """
+    rng = makeRandom(seed)
+    start = perf_counter()
+    deadline = start + budget
+    counts = zeros(known.shape, int64)
+    samples = 0
+    while True:
+        layout = sampleLayout(known, sizes, rng)
+        if layout is not None:
+            samples += 1
+            for x, y, isVert, size in layout:
+                counts[(slice(y, y + size), x) if isVert else (y, slice(x, x + size))] += 1
+        if perf_counter() >= deadline:
+            return counts, samples, perf_counter() - start
+
+
+if __name__ == '__main__':
+    pass
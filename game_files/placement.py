@@ -0,0 +1,186 @@
+from time import perf_counter
+
+from numpy import concatenate, frombuffer, flatnonzero, int32, uint8, zeros
+
+from .rng import makeRandom
+
+
+class PlacementError(Exception):
+    """Fleet can not be placed on the field"""
+
+
+def windowSums(values, size, dtype=int32):
+    """get sums of windows of given size along the rows
+
+    Result is indexed by the first cell of the window.
+    """
+    height, width = values.shape
+    count = max(width - size + 1, 0)
+    sums = zeros((height, width + 1), dtype)
+    values.cumsum(1, out=sums[:, 1:])
+    return sums[:, size:size + count] - sums[:, :count]
+
+
+def freeWindows(blocked, size, axis=1):
+    """get mask of windows of given size without blocked cells along the axis
+
+    Result is indexed by the first cell of the window.
+    """
+    if axis == 0:
+        return freeWindows(blocked.T, size).T
+    return windowSums(blocked, size) == 0
+
+
+def shipBox(x, y, isVertical, size, width, height):
+    """get bounds of the ship with its borders as (yStart, yEnd, xStart, xEnd)"""
+    ySize, xSize = (size, 1) if isVertical else (1, size)
+    return (max(y - 1, 0), min(y + ySize + 1, height),
+            max(x - 1, 0), min(x + xSize + 1, width))
+
+
+class Placement:
+    """Ship placement engine
+
+    Counts how many ship boxes cover every cell. Ships are probed at random
+    spots first, when probing fails the masks of still-legal horizontal and
+    vertical placements for the size are used to sample directly from legal
+    spots. Masks are kept per size and brought up to date only around the
+    boxes changed since their last use, so a dead end is undone locally.
+    """
+    _probes = 16
+
+    def __init__(self, width, height, maxSteps=None, rng=None) -> None:
+        self.width = width
+        self.height = height
+        self.maxSteps = maxSteps
+        self.rng = makeRandom(rng)
+        self._cover = bytearray(width * height)
+        self.cover = frombuffer(self._cover, uint8).reshape(height, width)
+        self.placed = []
+        self._legal = {}
+        self._changes = []
+        self._maxChanges = max(width * height // 2000, 8)
+        self.stats = {'steps': 0, 'backtracks': 0, 'exact': 0, 'seconds': 0.0}
+
+    # legal placement methods
+    def legal(self, size):
+        """get masks of legal (horizontal, vertical) placements by given size"""
+        return self.__legal(size)[:2]
+
+    def __legal(self, size):
+        """get [hMask, vMask, hRowCounts, vRowCounts, synced] by given size"""
+        masks = self._legal.get(size)
+        if masks is None or len(self._changes) - masks[4] > self._maxChanges:
+            blocked = self.cover > 0
+            hMask, vMask = freeWindows(blocked, size, 1), freeWindows(blocked, size, 0)
+            masks = self._legal[size] = [hMask, vMask, hMask.sum(1), vMask.sum(1), 0]
+        else:
+            for box in self._changes[masks[4]:]:
+                self.__refresh(size, masks, *box)
+        masks[4] = len(self._changes)
+        return masks
+
+    def __refresh(self, size, masks, yStart, yEnd, xStart, xEnd):
+        """Recompute masks of placements crossing the given box"""
+        hMask, vMask, hRows, vRows, _ = masks
+        x0 = max(xStart - size + 1, 0)
+        rows = freeWindows(
+            self.cover[yStart:yEnd, x0:xEnd + size - 1] > 0, size, 1)
+        old = hMask[yStart:yEnd, x0:x0 + rows.shape[1]]
+        hRows[yStart:yEnd] += rows.sum(1) - old.sum(1)
+        old[:] = rows
+        y0 = max(yStart - size + 1, 0)
+        cols = freeWindows(
+            self.cover[y0:yEnd + size - 1, xStart:xEnd] > 0, size, 0)
+        old = vMask[y0:y0 + cols.shape[0], xStart:xEnd]
+        vRows[y0:y0 + cols.shape[0]] += cols.sum(1) - old.sum(1)
+        old[:] = cols
+
+    def sample(self, size):
+        """get random legal (x, y, isVertical) by given size or None"""
+        rrange = self.rng.randrange
+        width, height = self.width, self.height
+        hCount = height * max(width - size + 1, 0)
+        vCount = width * max(height - size + 1, 0)
+        for _ in range(self._probes if hCount + vCount else 0):
+            n = rrange(hCount + vCount)
+            if n < hCount:
+                y, x = divmod(n, width - size + 1)
+                start = y * width + x
+                span = self._cover[start:start + size]
+            else:
+                y, x = divmod(n - hCount, width)
+                start = y * width + x
+                span = self._cover[start:start + size * width:width]
+            if span.count(0) == size:
+                return x, y, int(n >= hCount)
+        self.stats['exact'] += 1
+        hMask, vMask, hRows, vRows, _ = self.__legal(size)
+        rowCounts = concatenate((hRows, vRows))
+        count = int(rowCounts.sum())
+        if not count:
+            return None
+        # rows are picked by their counts so only one row is scanned
+        row = int(rowCounts.cumsum().searchsorted(rrange(count), 'right'))
+        isVertical = int(row >= len(hRows))
+        y = row - len(hRows) if isVertical else row
+        spots = flatnonzero((vMask if isVertical else hMask)[y])
+        return int(spots[rrange(len(spots))]), y, isVertical
+    # end
+
+    # place methods
+    def place(self, x, y, isVertical, size):
+        """Put ship on the cover grid"""
+        box = shipBox(x, y, isVertical, size, self.width, self.height)
+        self.cover[box[0]:box[1], box[2]:box[3]] += 1
+        self.placed.append((x, y, isVertical, size))
+        self._changes.append(box)
+
+    def undo(self):
+        """Remove last placed ship"""
+        x, y, isVertical, size = self.placed.pop()
+        box = shipBox(x, y, isVertical, size, self.width, self.height)
+        self.cover[box[0]:box[1], box[2]:box[3]] -= 1
+        self._changes.append(box)
+        return size
+
+    def placeFleet(self, sizes):
+        """Place ships by given sizes, returns list of (x, y, isVertical, size)
+
+        On a dead end the last ships are taken back, twice as many on every
+        failure at the same depth. Work is bounded by maxSteps.
+        """
+        start = perf_counter()
+        maxSteps = self.maxSteps or 64 * len(sizes) + 1024
+        stats = self.stats
+        depth, failedAt = 1, -1
+        i = len(self.placed)
+        while i < len(sizes):
+            stats['steps'] += 1
+            if stats['steps'] > maxSteps:
+                stats['seconds'] += perf_counter() - start
+                raise PlacementError(
+                    f'fleet has not been placed in {maxSteps} steps')
+            spot = self.sample(sizes[i])
+            if spot is not None:
+                self.place(*spot, sizes[i])
+                i += 1
+                if i > failedAt:
+                    depth = 1
+                continue
+            if not i:
+                raise PlacementError(
+                    f'ship of size {sizes[i]} does not fit the field')
+            stats['backtracks'] += 1
+            failedAt = max(failedAt, i)
+            for _ in range(min(depth, i)):
+                self.undo()
+                i -= 1
+            depth *= 2
+        stats['seconds'] += perf_counter() - start
+        return list(self.placed)
+    # end
+
+
+if __name__ == '__main__':
+    pass
@@ -1,13 +1,11 @@
 import os
 from re import IGNORECASE, compile
-from string import ascii_lowercase as aLower
-from bisect import bisect_left as bLeft
 from weakref import ref
-import json
 from pathlib import Path
 
 from .jsdata import DataBase
-from .field import Field
+from .field import Field, colIndex
+from .inputs import TerminalInput
 from .settings import Settings
 
 
@@ -15,22 +13,19 @@ class PlayerData(DataBase):
     _fileName = os.path.join(str(Path(__file__).resolve().parent),
                              'gameData', 'PlayersData.json')
 
-    def loadPlayers(self):
-        try:
-            with open(self._fileName, 'r', encoding='utf-8') as pFile:
-                self.players = {name: Player(name=name, **data)
-                                for name, data in json.load(pFile).items()}
-        except Exception:
-            return
+    def _scores(self, player):
+        return {mode: getattr(player, mode) for mode in player.modes}
 
 
 class PlayerBase:
+    # subclasses without slots, e.g. the bots, keep their data in __dict__
+    __slots__ = ('name', '__eField')
 
     def __init__(self, name: str) -> None:
         self.name = name
         self.__eField = None  # enemyField
 
-    def updateScores(self, win):
+    def updateScores(self, win, shots=0):
         pass
 
     @property
@@ -45,8 +40,7 @@ class PlayerBase:
         return self.name
 
     def toJS(self):
-        del self.__eField, self.name
-        return self.__dict__
+        return dict(getattr(self, '__dict__', {}))
 
     @classmethod
     def fromDict(cls, dct):
@@ -54,14 +48,21 @@ class PlayerBase:
 
 
 class Player(PlayerBase):
+    # game modes with scores
+    modes = ('easy', 'medium', 'hard', 'veryHard', 'unreal', 'expert')
+    __slots__ = (*modes, 'settings', 'inputs')
 
     inputPattern = compile(
-        r'\s*(?:([a-z])\s*(\d{1,2})|(\d{1,2})\s*([a-z]))\s*', IGNORECASE)
+        r'\s*(?:([a-z]{1,3})\s*(\d{1,4})|(\d{1,4})\s*([a-z]{1,3})'
+        r'|(\d{1,4})\s*[\s,]\s*(\d{1,4}))\s*', IGNORECASE)
 
     def __init__(self, name: str, easy=0, medium=0, hard=0,
-                 veryHard=0, unreal=0, settings=None) -> None:
+                 veryHard=0, unreal=0, expert=0, settings=None, inputs=None) -> None:
         super().__init__(name)
+        # source of the typed coords, see inputs.InputSource
+        self.inputs = TerminalInput() if inputs is None else inputs
         self.easy, self.medium, self.hard, self.veryHard, self.unreal = easy, medium, hard, veryHard, unreal
+        self.expert = expert
 
         if settings is None:
             self.settings = Settings()
@@ -69,41 +70,51 @@ class Player(PlayerBase):
             self.settings = Settings(**settings)
 
     def toJS(self):
-        tmp = dict(super().toJS())
-        tmp['settings'] = tmp['settings'].toJS()
-        return tmp
+        data = {mode: getattr(self, mode) for mode in self.modes}
+        data['settings'] = self.settings.toJS()
+        return data
 
-    def updateScores(self, win):
-        self.__dict__[self.settings.gameMode] += win or -1
+    def updateScores(self, win, shots=0):
+        mode = self.settings.gameMode
+        setattr(self, mode, getattr(self, mode) + (win or -1))
 
     def resetScores(self):
-        self.easy = self.medium = self.hard = self.veryHard = self.unreal = 0
+        self.easy = self.medium = self.hard = self.veryHard = self.unreal = self.expert = 0
+
+    @classmethod
+    def parseCoords(cls, text):
+        """get (x, y) from coords like 'b12', '12b' or numeric '2 12', None if incorrect"""
+        result = cls.inputPattern.fullmatch(text)
+        if not result:
+            return None
+        col, row, rowFirst, colLast, numCol, numRow = result.groups()
+        if col:
+            return colIndex(col), int(row) - 1
+        if colLast:
+            return colIndex(colLast), int(rowFirst) - 1
+        return int(numCol) - 1, int(numRow) - 1
 
     def __getCorrectInput(self):
         """"""
-        result = input(f"{self.name} Enter coords(col, row): ")
-        result = self.inputPattern.fullmatch(result)
+        result = self.parseCoords(self.inputs(f"{self.name} Enter coords(col, row): "))
         while not result:
             print('Incorrect input! Try again')
-            result = input(f"\n{self.name}Enter coords(col, row): ")
-            result = self.inputPattern.fullmatch(result)
-        result = result.groups()
-        return result[:2] if result[1] else result[-1:-3:-1]
+            result = self.parseCoords(self.inputs(f"\n{self.name}Enter coords(col, row): "))
+        return result
 
     def __call__(self) -> tuple[int]:
         x, y = self.__getCorrectInput()
-        x, y = bLeft(aLower, x.lower()), int(y) - 1
         while True:
             try:
-                if self.eField[y, x].isOpened():
+                if not (0 <= x < self.eField.width and 0 <= y < self.eField.height) \
+                        or self.eField[y, x].isOpened():
                     raise IndexError
             except IndexError:
                 print('Incorrect input! Try again')
                 x, y = self.__getCorrectInput()
-                x, y = bLeft(aLower, x), int(y) - 1
             else:
                 break
-        return self.eField[y, x].open()
+        return self.eField.open(y, x)
 
 
 if __name__ == '__main__':
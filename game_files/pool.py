@@ -0,0 +1,110 @@
+from collections import OrderedDict
+from threading import Condition, Thread
+
+
+class FieldPool:
+    """Fields made ahead by a background thread
+
+    Fields are kept per key (width, height, hidden, maxSize), a key gets up
+    to size ready fields. Only the last maxKeys prepared or taken keys are
+    kept, so changing the settings evicts fields of the old ones. A take
+    without a ready field makes it at once and prepares the key for the
+    next games. Without fieldClass GridField is imported by the first field.
+    """
+
+    def __init__(self, fieldClass=None, size=2, maxKeys=2) -> None:
+        self.fieldClass = fieldClass
+        self.size = size
+        self.maxKeys = maxKeys
+        self._fields = OrderedDict()
+        self._cond = Condition()
+        self._closed = False
+        self._thread = None
+        self.stats = {'hits': 0, 'misses': 0, 'made': 0, 'evicted': 0}
+
+    def __len__(self) -> int:
+        return sum(map(len, self._fields.values()))
+
+    # pool methods
+    def prepare(self, width, height, hidden=True, maxSize=None):
+        """Ask the worker to make fields of given settings"""
+        key = (width, height, hidden, maxSize)
+        with self._cond:
+            self._fields.setdefault(key, [])
+            self._fields.move_to_end(key)
+            while len(self._fields) > self.maxKeys:
+                _, fields = self._fields.popitem(False)
+                self.stats['evicted'] += len(fields)
+            self._cond.notify()
+        if self._thread is None and not self._closed:
+            self._thread = Thread(target=self._work, name='FieldPool', daemon=True)
+            self._thread.start()
+
+    def take(self, width, height, hidden=True, maxSize=None):
+        """get ready field of given settings or make it"""
+        key = (width, height, hidden, maxSize)
+        with self._cond:
+            fields = self._fields.get(key)
+            field = fields.pop() if fields else None
+            self.stats['hits' if field is not None else 'misses'] += 1
+        self.prepare(*key)
+        if field is None:
+            field = self._make(key)
+        return field
+
+    def clear(self):
+        """Drop all ready fields and keys"""
+        with self._cond:
+            self.stats['evicted'] += len(self)
+            self._fields.clear()
+
+    def close(self):
+        """Stop the worker, ready fields are dropped"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.clear()
+    # end
+
+    # worker methods
+    def _make(self, key):
+        """Create field by given key"""
+        if self.fieldClass is None:
+            from .gridfield import GridField
+            self.fieldClass = GridField
+        return self.fieldClass(*key)
+
+    def _needed(self):
+        """get key which lacks fields, the latest prepared first"""
+        for key in reversed(self._fields):
+            if len(self._fields[key]) < self.size:
+                return key
+        return None
+
+    def _work(self):
+        """Fill the pool until it is closed"""
+        while True:
+            with self._cond:
+                key = self._needed()
+                while key is None and not self._closed:
+                    self._cond.wait()
+                    key = self._needed()
+                if self._closed:
+                    return
+            # the field is made without the lock, so takes are not blocked
+            field = self._make(key)
+            with self._cond:
+                fields = self._fields.get(key)
+                if fields is not None and len(fields) < self.size:
+                    fields.append(field)
+                    self.stats['made'] += 1
+                else:
+                    self.stats['evicted'] += 1
+    # end
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,115 @@
+from collections import Counter
+from contextlib import contextmanager
+import json
+from time import perf_counter
+
+
+class Probe:
+    """Opt-in counters and timers of the hot paths
+
+    Call sites check enabled before doing any work, so a disabled probe costs
+    one attribute lookup. Timers keep count, total and max seconds. Stats are
+    collected per match: startMatch resets them and endMatch prints the
+    summary and exports them as JSON and cProfile stats when files are set.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.jsonFile = None
+        self.profileFile = None
+        self._profile = None
+        self.reset()
+
+    def enable(self, jsonFile=None, profileFile=None):
+        """Turn the probe on, given files get the stats of every match"""
+        self.enabled = True
+        self.jsonFile = jsonFile
+        self.profileFile = profileFile
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self.counters = Counter()
+        self.timers = {}
+
+    # collect methods
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def add(self, name, seconds):
+        """Add measured seconds to the timer"""
+        timer = self.timers.get(name)
+        if timer is None:
+            self.timers[name] = [1, seconds, seconds]
+        else:
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = max(timer[2], seconds)
+
+    def placement(self, stats):
+        """Count stats of the fleet placement of a field, see Field.placeStats"""
+        self.count('placement/attempts', stats['steps'])
+        self.count('placement/backtracks', stats['backtracks'])
+        self.count('placement/exact', stats['exact'])
+        self.add('placement/fleet', stats['seconds'])
+
+    @contextmanager
+    def timer(self, name):
+        """Measure the block, use it only when the probe is enabled"""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, perf_counter() - start)
+    # end
+
+    # match methods
+    def startMatch(self):
+        """Reset stats and start profiling"""
+        if not self.enabled:
+            return
+        self.reset()
+        if self.profileFile:
+            from cProfile import Profile
+            self._profile = Profile()
+            self._profile.enable()
+
+    def endMatch(self):
+        """Print the summary and export stats of the match"""
+        if not self.enabled:
+            return
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats(self.profileFile)
+            self._profile = None
+        print(self.summary())
+        if self.jsonFile:
+            with open(self.jsonFile, 'w', encoding='utf-8') as sFile:
+                json.dump(self.toDict(), sFile, indent=4)
+    # end
+
+    # report methods
+    def toDict(self):
+        return {'counters': dict(self.counters),
+                'timers': {name: {'count': count, 'total': total,
+                                  'mean': total / count, 'max': most}
+                           for name, (count, total, most) in self.timers.items()}}
+
+    def summary(self) -> str:
+        rows = [f"{'timer':<28}{'count':>8}{'total ms':>11}{'mean us':>11}{'max us':>11}"]
+        for name, (count, total, most) in sorted(self.timers.items()):
+            rows.append(f'{name:<28}{count:>8}{total*1e3:>11.2f}'
+                        f'{total / count*1e6:>11.1f}{most*1e6:>11.1f}')
+        rows.append(f"{'counter':<28}{'value':>8}")
+        rows += (f'{name:<28}{value:>8}' for name, value in sorted(self.counters.items()))
+        return '\n'.join(rows)
+    # end
+
+
+# probe shared by the whole game
+probe = Probe()
+
+
+if __name__ == '__main__':
+    pass
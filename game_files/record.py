@@ -0,0 +1,125 @@
+from array import array
+from struct import Struct
+
+from numpy import array as npArray, dtype, frombuffer, memmap, uint8
+
+# magic, version, bytes per shot, winner, flags, width, height, seed,
+# ships of the player 0, ships of the player 1, shots
+HEADER = Struct('<4sBBBBHHQIII')
+MAGIC = b'SWR1'
+VERSION = 1
+HAS_SEED, NO_WINNER = 1, 255
+
+SHIP = dtype([('x', '<u2'), ('y', '<u2'), ('isVertical', 'u1'), ('size', 'u1')])
+# bytes per shot: (array typecode, dtype in the file)
+_SHOTS = {1: ('B', dtype('u1')), 2: ('H', dtype('<u2')), 4: ('I', dtype('<u4'))}
+
+
+def shotBytes(width, height):
+    """get count of bytes per shot code of the field"""
+    codes = width * height * 2
+    return 1 if codes <= 2**8 else 2 if codes <= 2**16 else 4
+
+
+def layoutArray(layout):
+    """get structured array of given layout [(x, y, isVertical, size)]"""
+    if getattr(layout, 'dtype', None) == SHIP:
+        return layout
+    return npArray([tuple(map(int, ship)) for ship in layout], SHIP)
+
+
+class GameRecord:
+    """Recorded game: field size, seed, layouts of both fleets and shots
+
+    Player 0 shoots first and defends layouts[0]. Every shot is a code
+    cell << 1 | attacker where cell = y*width + x, so a record takes a fixed
+    header, six bytes per ship and one, two or four bytes per shot by the
+    size of the field. Hits are not stored, they follow from the layouts.
+    """
+
+    def __init__(self, width, height, layouts, shots, seed=None, winner=None) -> None:
+        self.width = width
+        self.height = height
+        self.layouts = tuple(layoutArray(layout) for layout in layouts)
+        self.shots = shots
+        self.seed = seed
+        self.winner = winner
+
+    def __len__(self) -> int:
+        return len(self.shots)
+
+    def attackers(self):
+        """get array of the players who made the shots"""
+        return self.shots & 1
+
+    def cells(self):
+        """get array of flat indexes of the shot cells"""
+        return self.shots >> 1
+
+    # bytes methods
+    def toBytes(self) -> bytes:
+        """get record in the binary format"""
+        size = shotBytes(self.width, self.height)
+        header = HEADER.pack(
+            MAGIC, VERSION, size, NO_WINNER if self.winner is None else self.winner,
+            HAS_SEED if self.seed is not None else 0, self.width, self.height,
+            self.seed or 0, *map(len, self.layouts), len(self.shots))
+        return b''.join((header, *(layout.tobytes() for layout in self.layouts),
+                         self.shots.astype(_SHOTS[size][1]).tobytes()))
+
+    @classmethod
+    def fromBuffer(cls, buffer, offset=0):
+        """get (record, offset of the next record) from bytes or memmap,
+        arrays of the record are views of the buffer"""
+        (magic, version, size, winner, flags, width, height, seed,
+         ships0, ships1, shots) = HEADER.unpack_from(buffer, offset)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'no game record at offset {offset}')
+        offset += HEADER.size
+        layouts = []
+        for count in (ships0, ships1):
+            layouts.append(frombuffer(buffer, SHIP, count, offset))
+            offset += count * SHIP.itemsize
+        codes = frombuffer(buffer, _SHOTS[size][1], shots, offset)
+        offset += shots * size
+        return cls(width, height, layouts, codes, seed if flags & HAS_SEED else None,
+                   None if winner == NO_WINNER else winner), offset
+
+    def save(self, fileName, append=True):
+        """Write record to the file, by default it is appended to the archive"""
+        with open(fileName, 'ab' if append else 'wb') as rFile:
+            rFile.write(self.toBytes())
+    # end
+
+
+def readRecords(fileName):
+    """get iterator of the records of the archive, the file is memory mapped"""
+    buffer = memmap(fileName, uint8, 'r')
+    offset = 0
+    while offset < len(buffer):
+        record, offset = GameRecord.fromBuffer(buffer, offset)
+        yield record
+
+
+class Recorder:
+    """Collects shots of a game, a shot is one append to a compact array"""
+
+    def __init__(self, fields, seed=None) -> None:
+        self.width, self.height = fields[0].width, fields[0].height
+        self.layouts = tuple(field.layout for field in fields)
+        self.seed = seed
+        self.shots = array(_SHOTS[shotBytes(self.width, self.height)][0])
+
+    def shot(self, attacker, y, x):
+        """Record shot of the attacker at given coords"""
+        self.shots.append((y*self.width + x) << 1 | attacker)
+
+    def record(self, winner=None) -> GameRecord:
+        """get record of the shots made so far"""
+        return GameRecord(self.width, self.height, self.layouts,
+                          frombuffer(self.shots, self.shots.typecode).copy(),
+                          self.seed, winner)
+
+
+if __name__ == '__main__':
+    pass
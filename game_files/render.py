@@ -0,0 +1,114 @@
+from shutil import get_terminal_size
+import sys
+from time import perf_counter
+
+from .probe import probe
+
+# ANSI escape sequences
+_HOME_CLEAR = '\x1b[H\x1b[2J'
+_CLEAR_LINE = '\x1b[K'
+_CLEAR_BELOW = '\x1b[J'
+
+
+def _moveTo(line):
+    """get sequence moving the cursor to the start of given line (0 based)"""
+    return f'\x1b[{line + 1};1H'
+
+
+class FieldView:
+    """Rendered lines of one field, rows are rendered again only when changed"""
+
+    def __init__(self, field) -> None:
+        self.field = field
+        self.window = None
+        self.lines = []
+
+    def update(self):
+        """get lines of the field, renders only dirty rows of the same window"""
+        field = self.field
+        window = field._window()
+        dirty = field.takeDirty()
+        if dirty is None or window != self.window:
+            self.__renderAll(window)
+            return self.lines
+        rows, cols = window
+        for y in dirty:
+            if rows.start <= y < rows.stop:
+                chars = next(field._charRows(slice(y, y + 1), cols))
+                self.lines[(y - rows.start)*2 + 2] = field._mapRow(y, chars, self._nWidth)
+        return self.lines
+
+    def __renderAll(self, window):
+        """Render every line of the window"""
+        field, (rows, cols) = self.field, window
+        header, rSep, self._nWidth = field._mapLayout(rows, cols)
+        self.window = window
+        self.lines = [header]
+        for y, chars in enumerate(field._charRows(rows, cols), rows.start):
+            self.lines += (rSep, field._mapRow(y, chars, self._nWidth))
+        self.lines.append(rSep)
+
+
+class Renderer:
+    """Incremental renderer of fields placed side by side
+
+    Keeps the last frame and rewrites only its changed lines through ANSI
+    cursor moves, everything below the frame is cleared. The frame is written
+    by one write call. Output which is not a terminal or a frame which does
+    not fit the terminal gets full frames without escape sequences.
+    """
+    # lines kept under the frame for info boxes and input
+    reserve = 8
+
+    def __init__(self, *fields, sepSize=10, out=None, ansi=None) -> None:
+        self.views = [FieldView(field) for field in fields]
+        self.sep = ' '*sepSize
+        self.out = out or sys.stdout
+        # None detects the terminal, True or False forces cursor moves
+        self.ansi = ansi
+        self._screen = None
+        self.stats = {'frames': 0, 'lines': 0, 'bytes': 0}
+
+    def frame(self):
+        """get lines of the current frame"""
+        return [''] + [self.sep.join(rows)
+                       for rows in zip(*(view.update() for view in self.views))]
+
+    def render(self):
+        """Write the changes of the frame"""
+        start = perf_counter()
+        lines = self.frame()
+        canMove = self.__canMove(len(lines))
+        if not canMove:
+            changed = lines
+            text = '\n'.join(lines) + '\n'
+        elif self._screen is None or len(self._screen) != len(lines):
+            changed = lines
+            text = _HOME_CLEAR + '\n'.join(lines) + '\n'
+        else:
+            changed = [n for n, (line, old) in enumerate(zip(lines, self._screen))
+                       if line != old]
+            text = ''.join(f'{_moveTo(n)}{lines[n]}{_CLEAR_LINE}' for n in changed) + \
+                _moveTo(len(lines)) + _CLEAR_BELOW
+        self._screen = lines if canMove else None
+        self.out.write(text)
+        self.out.flush()
+        stats = self.stats
+        stats['frames'] += 1
+        stats['lines'] += len(changed)
+        stats['bytes'] += len(text.encode())
+        if probe.enabled:
+            probe.add('render/frame', perf_counter() - start)
+            probe.count('render/lines', len(changed))
+
+    def __canMove(self, height):
+        """check that cursor moves can be used for the frame of given height"""
+        if self.ansi is not None:
+            return self.ansi
+        isatty = getattr(self.out, 'isatty', None)
+        return bool(isatty and isatty()) and \
+            height + self.reserve <= get_terminal_size().lines
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,61 @@
+from .gridfield import GridField
+from .match import Turn
+from .record import GameRecord
+
+
+class Replay:
+    """Replay of the recorded game on GridFields built from its layouts
+
+    step plays one shot, seek opens all shots up to the turn at once.
+    """
+
+    def __init__(self, record: GameRecord, hidden=False) -> None:
+        self.record = record
+        self.hidden = hidden
+        self._attackers = record.attackers()
+        self._cells = record.cells()
+        self.reset()
+
+    def reset(self):
+        """Go back to the start of the game"""
+        record = self.record
+        self.fields = tuple(GridField.fromLayout(record.width, record.height,
+                                                 layout.tolist(), self.hidden)
+                            for layout in record.layouts)
+        self.turn = 0
+
+    def step(self) -> Turn:
+        """Play the next shot"""
+        attacker = int(self._attackers[self.turn])
+        y, x = divmod(int(self._cells[self.turn]), self.record.width)
+        isHit = self.fields[attacker ^ 1].open(y, x)
+        self.turn += 1
+        return Turn(attacker, y, x, isHit)
+
+    def seek(self, turn):
+        """Set fields to the state after given count of shots"""
+        turn = min(max(turn, 0), len(self.record))
+        if turn < self.turn:
+            self.reset()
+        attackers, cells = self._attackers[self.turn:turn], self._cells[self.turn:turn]
+        for attacker, field in enumerate(self.fields[::-1]):
+            field.openMany(cells[attackers == attacker])
+        if turn > self.turn:
+            attacker = int(self._attackers[turn - 1])
+            self.fields[attacker ^ 1].lastShot = self.fields[attacker ^ 1].focus = \
+                divmod(int(self._cells[turn - 1]), self.record.width)
+        self.turn = turn
+
+    def hits(self):
+        """get array of the results of all shots"""
+        record, hits = self.record, self._attackers.astype(bool)
+        for defender, layout in enumerate(record.layouts):
+            ships = GridField.fromLayout(record.width, record.height,
+                                         layout.tolist()).shipIds.reshape(-1)
+            shots = self._attackers != defender
+            hits[shots] = ships[self._cells[shots]] >= 0
+        return hits
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,41 @@
+import random
+import sys
+
+
+def makeRandom(rng=None) -> random.Random:
+    """get random.Random by given seed or generator
+
+    None gives a generator seeded from the system, so objects never share
+    the hidden state of the random module. A NumPy Generator seeds the new
+    generator by its next number.
+    """
+    if isinstance(rng, random.Random):
+        return rng
+    # a SeedSequence or a Generator exists only when NumPy has been imported
+    npRandom = sys.modules.get('numpy.random')
+    if npRandom is not None:
+        if isinstance(rng, npRandom.SeedSequence):
+            return random.Random(int.from_bytes(rng.generate_state(4, 'uint32').tobytes(),
+                                                'little'))
+        if isinstance(rng, npRandom.Generator):
+            return random.Random(int(rng.integers(2**63)))
+    return random.Random(rng)
+
+
+def seedSequence(seed=None, key=()):
+    """get SeedSequence by given int seed, sequence or Generator and spawn key"""
+    from numpy.random import Generator, SeedSequence
+    if isinstance(seed, SeedSequence):
+        return SeedSequence(seed.entropy, spawn_key=seed.spawn_key + tuple(key))
+    if isinstance(seed, Generator):
+        seed = int(seed.integers(2**63))
+    return SeedSequence(seed, spawn_key=tuple(key))
+
+
+def streams(seed, count):
+    """get count of independent random.Random generators made from the seed"""
+    return [makeRandom(child) for child in seedSequence(seed).spawn(count)]
+
+
+if __name__ == '__main__':
+    pass
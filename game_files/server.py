@@ -0,0 +1,530 @@
+from argparse import ArgumentParser
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from inspect import signature
+from itertools import count
+import random
+from time import monotonic, perf_counter
+
+from numpy import flatnonzero
+
+from .bots import MODES, botMove
+from .field import colLabel
+from .gridfield import OPENED, GridField
+from .player import Player
+
+PROTOCOL = 1
+# side of the biggest field a session can ask for
+MAX_SIZE = 100
+
+
+class BotRunner:
+    """Runs moves of the bots of the matches
+
+    Inline moves call the bot in the event loop. On a thread or process pool
+    the move is made by bots.botMove on the packed field, so a slow bot does
+    not stall other sessions and only bytes cross the process boundary. A
+    move which lasts longer than timeout seconds is cancelled and replaced
+    by a random shot.
+    """
+    _pools = {'thread': ThreadPoolExecutor, 'process': ProcessPoolExecutor}
+
+    def __init__(self, kind='inline', workers=None, timeout=None) -> None:
+        self.kind = kind
+        self.timeout = timeout
+        self._pool = None if kind == 'inline' else self._pools[kind](workers)
+        self.stats = {'moves': 0, 'timeouts': 0}
+
+    async def move(self, bot, field):
+        """Make the shot of the bot on the field, get True if a ship has been hit"""
+        self.stats['moves'] += 1
+        if self._pool is None:
+            return bot()
+        future = asyncio.get_running_loop().run_in_executor(
+            self._pool, botMove, type(bot).__name__, field.pack(), bot.rng.getrandbits(64))
+        try:
+            y, x = await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            self.stats['timeouts'] += 1
+            cells = flatnonzero(field.state & OPENED == 0)
+            y, x = divmod(int(cells[bot.rng.randrange(len(cells))]), field.width)
+        return field.open(y, x)
+
+    def close(self):
+        """Shut down the pool, waiting moves are cancelled"""
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+
+class ServerMatch:
+    """Match between two sides of the server, a side is a session or a bot
+
+    Side 0 shoots first, fields[i] is defended by the side i. Fields of both
+    sides are hidden, the sessions get only the results of the shots.
+    """
+
+    def __init__(self, sides, width, height, maxSize=None) -> None:
+        self.sides = sides
+        self.fields = tuple(GridField(width, height, True, maxSize) for _ in sides)
+        for side, field in zip(sides, self.fields[::-1]):
+            if not isinstance(side, Session):
+                side.eField = field
+        self.attacking = 0
+        self.shots = 0
+        self.winner = None
+
+    @property
+    def target(self) -> GridField:
+        """get field of the defending side"""
+        return self.fields[self.attacking ^ 1]
+
+    def settle(self, isHit):
+        """Finish the last shot of the attacking side, get (coords, result)"""
+        field = self.target
+        y, x = field.lastShot
+        self.shots += 1
+        result = 'MISS' if not isHit else 'HIT' if field.shipAt(y, x) else 'SUNK'
+        attacking = self.attacking
+        if not field:
+            self.winner = attacking
+        elif not isHit:
+            self.attacking ^= 1
+        return attacking, f'{colLabel(x)}{y + 1}', result
+
+    def announce(self, attacker, coords, result):
+        """Send result of the shot to the sessions"""
+        for n, side in enumerate(self.sides):
+            if isinstance(side, Session):
+                side.send(f"{'SHOT' if n == attacker else 'ENEMY'} {coords} {result}")
+
+    async def advance(self, runner):
+        """Play turns of the bots and pass the turn to the next session"""
+        while self.winner is None and not isinstance(self.sides[self.attacking], Session):
+            self.announce(*self.settle(await runner.move(self.sides[self.attacking],
+                                                         self.target)))
+        if self.winner is None:
+            self.sides[self.attacking].send('TURN')
+        else:
+            self.end(self.winner)
+
+    def end(self, winner, reason=''):
+        """Send results to the sessions and detach them"""
+        self.winner = winner
+        for n, side in enumerate(self.sides):
+            if isinstance(side, Session) and side.match is self:
+                side.send(f"END {'WIN' if n == winner else 'LOSE'} {self.shots} {reason}".rstrip())
+                side.match = None
+
+
+class Session:
+    """Connection of one client
+
+    Every command is one line, the answer is one or more lines. Commands:
+    NAME name, PLAY mode [width height] against a bot, JOIN [width height]
+    against the next client which joins with the same size, SHOT coords,
+    BOARD, PING and QUIT. The idle timeout counts from the last line of the
+    client or the last TURN, a session waiting for an opponent or for its
+    turn is never idle.
+    """
+    _commands = {'NAME': 'setName', 'PLAY': 'play', 'JOIN': 'join',
+                 'SHOT': 'shot', 'BOARD': 'board', 'PING': 'ping', 'QUIT': 'quit'}
+    _numbers = count(1)
+
+    def __init__(self, server, reader, writer) -> None:
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.name = f'guest{next(self._numbers)}'
+        self.match = None
+        self.closed = False
+        self.task = None
+        self.active = monotonic()
+
+    def send(self, line):
+        if not self.closed:
+            if line == 'TURN':
+                self.active = monotonic()
+            self.writer.write(f'{line}\n'.encode())
+
+    def waits(self):
+        """get True if the session waits for an opponent or for its turn"""
+        match = self.match
+        if match is not None:
+            return match.winner is None and match.sides[match.attacking] is not self
+        return self in self.server.waiting.values()
+
+    async def run(self):
+        """Answer commands until the client quits or stays idle too long"""
+        self.send(f'HELLO SpaceWar {PROTOCOL}')
+        read = None
+        try:
+            while not self.closed:
+                if read is None:
+                    read = asyncio.ensure_future(self.reader.readline())
+                timeout = self.active + self.server.idleTimeout - monotonic()
+                done, _ = await asyncio.wait((read,), timeout=max(timeout, 0))
+                if not done:
+                    if self.waits():
+                        self.active = monotonic()
+                    elif monotonic() - self.active >= self.server.idleTimeout:
+                        self.send('BYE idle')
+                        break
+                    continue
+                line, read = read.result(), None
+                self.active = monotonic()
+                if not line:
+                    break
+                command, *args = line.decode(errors='replace').split() or ('',)
+                method = self._commands.get(command.upper())
+                if method is None:
+                    self.send(f'ERR unknown command {command}')
+                else:
+                    method = getattr(self, method)
+                    try:
+                        signature(method).bind(*args)
+                    except TypeError:
+                        self.send(f'ERR wrong arguments of {command.upper()}')
+                    else:
+                        await method(*args)
+                await self.writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if read is not None:
+                read.cancel()
+            await self.close()
+
+    async def close(self):
+        """Leave the match and close the connection"""
+        self.server.leave(self)
+        if self.match is not None:
+            match = self.match
+            match.end(match.sides.index(self) ^ 1, 'forfeit')
+            for side in match.sides:
+                if isinstance(side, Session) and side is not self:
+                    await side.flush()
+        self.closed = True
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def flush(self):
+        try:
+            await self.writer.drain()
+        except ConnectionError:
+            pass
+
+    # command methods
+    async def setName(self, name):
+        self.name = name
+        self.send(f'OK {name}')
+
+    async def play(self, mode, width='12', height='12'):
+        """Start match against the bot of the mode, the session shoots first"""
+        size = self._size(width, height)
+        if size is None:
+            return
+        if mode not in MODES:
+            return self.send(f"ERR modes are {' '.join(MODES)}")
+        self.server.startMatch((self, MODES[mode]()), *size)
+
+    async def join(self, width='12', height='12'):
+        """Start match against the waiting session or wait for one"""
+        size = self._size(width, height)
+        if size is None:
+            return
+        other = self.server.waiting.pop(size, None)
+        if other is None:
+            self.server.waiting[size] = self
+            return self.send('WAIT')
+        self.server.startMatch((other, self), *size)
+        await other.flush()
+
+    async def shot(self, coords):
+        match = self.match
+        if match is None or match.sides[match.attacking] is not self:
+            return self.send('ERR not your turn')
+        field = match.target
+        result = Player.parseCoords(coords)
+        if not result or not (0 <= result[0] < field.width and 0 <= result[1] < field.height):
+            return self.send('ERR incorrect coords')
+        x, y = result
+        if field[y, x].isOpened():
+            return self.send('ERR opened')
+        match.announce(*match.settle(field.open(y, x)))
+        self.server.stats['shots'] += 1
+        await match.advance(self.server.runner)
+        for side in match.sides:
+            if isinstance(side, Session) and side is not self:
+                await side.flush()
+
+    async def board(self):
+        """Send the enemy field as seen by the session"""
+        if self.match is None:
+            return self.send('ERR no match')
+        field = self.match.fields[self.match.sides.index(self) ^ 1]
+        rows = [''.join(row) for row in field._charRows()]
+        self.send(f'BOARD {len(rows)}')
+        for row in rows:
+            self.send(row)
+
+    async def ping(self):
+        self.send('PONG')
+
+    async def quit(self):
+        self.send('BYE')
+        self.closed = True
+    # end
+
+    def _size(self, width, height):
+        """get (width, height) of the new match or None if it can not start"""
+        if self.match is not None:
+            return self.send('ERR match is not finished')
+        if self in self.server.waiting.values():
+            return self.send('ERR waiting for the match')
+        if not (width.isdigit() and height.isdigit()
+                and 5 <= int(width) <= MAX_SIZE and 5 <= int(height) <= MAX_SIZE):
+            return self.send(f'ERR sizes should be in range (5, {MAX_SIZE})')
+        return int(width), int(height)
+
+
+class Server:
+    """TCP server of many matches in one event loop"""
+
+    def __init__(self, host='127.0.0.1', port=8765, idleTimeout=300, maxSize=None,
+                 backlog=4096, runner=None) -> None:
+        self.host = host
+        self.port = port
+        self.idleTimeout = idleTimeout
+        self.maxSize = maxSize
+        self.backlog = backlog
+        self.runner = BotRunner() if runner is None else runner
+        self.sessions = set()
+        # sessions waiting for an opponent by field size
+        self.waiting = {}
+        self.stats = {'sessions': 0, 'matches': 0, 'shots': 0}
+        self._server = None
+
+    async def start(self):
+        """Start listening, port 0 takes a free port"""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port,
+                                                  backlog=self.backlog)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """Stop listening and close all sessions"""
+        self._server.close()
+        tasks = [session.task for session in self.sessions]
+        for session in tuple(self.sessions):
+            session.writer.close()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._server.wait_closed()
+        self.runner.close()
+
+    async def _handle(self, reader, writer):
+        session = Session(self, reader, writer)
+        session.task = asyncio.current_task()
+        self.sessions.add(session)
+        self.stats['sessions'] += 1
+        await session.run()
+
+    def startMatch(self, sides, width, height):
+        """Start the match of given sides"""
+        match = ServerMatch(sides, width, height, self.maxSize)
+        self.stats['matches'] += 1
+        for n, side in enumerate(sides):
+            if isinstance(side, Session):
+                side.match = match
+                side.send(f"START {width} {height} {'FIRST' if n == 0 else 'SECOND'}")
+        sides[0].send('TURN')
+        return match
+
+    def leave(self, session):
+        """Forget closed session"""
+        self.sessions.discard(session)
+        for size, waiting in list(self.waiting.items()):
+            if waiting is session:
+                del self.waiting[size]
+
+
+# load test methods
+async def _client(host, port, mode, width, height, rng, latencies):
+    """Play one match against the bot, get 'finished', 'forfeit' or None
+    when it has not ended, latencies get seconds from a shot to the next turn"""
+    reader, writer = await asyncio.open_connection(host, port)
+    cells = [(x, y) for y in range(height) for x in range(width)]
+    rng.shuffle(cells)
+    start = None
+    try:
+        await reader.readline()
+        writer.write(f'PLAY {mode} {width} {height}\n'.encode())
+        while True:
+            line = (await reader.readline()).decode()
+            # borders of the sunk ships are opened by the server
+            if line.startswith(('TURN', 'ERR opened')):
+                if line.startswith('TURN') and start is not None:
+                    latencies.append(perf_counter() - start)
+                x, y = cells.pop()
+                writer.write(f'SHOT {colLabel(x)}{y + 1}\n'.encode())
+                start = perf_counter()
+            elif not line or line.startswith(('END', 'ERR', 'BYE')):
+                # END WIN|LOSE shots [reason], the match is forfeited when
+                # a session leaves or fails
+                words = line.split()
+                if words[:1] != ['END']:
+                    return None
+                return 'finished' if len(words) == 3 else 'forfeit'
+    finally:
+        writer.close()
+
+
+async def _pinger(host, port, pings, period=0.05):
+    """Measure round trips of PING until cancelled"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        await reader.readline()
+        while True:
+            start = perf_counter()
+            writer.write(b'PING\n')
+            await reader.readline()
+            pings.append(perf_counter() - start)
+            await asyncio.sleep(period)
+    finally:
+        writer.close()
+
+
+def _quantile(values, q):
+    """get milliseconds of the quantile of sorted seconds"""
+    return values[min(int(q * len(values)), len(values) - 1)] * 1e3 if values else 0
+
+
+async def loadTest(host, port, sessions=1000, mode='easy', width=12, height=12, seed=None):
+    """Play matches of all sessions at once, get report of the load
+
+    Turn times include moves of the bot, pings show how long the server
+    keeps a client waiting meanwhile.
+    """
+    rng = random.Random(seed)
+    latencies, pings = [], []
+    pinger = asyncio.create_task(_pinger(host, port, pings))
+    start = perf_counter()
+    results = await asyncio.gather(
+        *(_client(host, port, mode, width, height, random.Random(rng.random()), latencies)
+          for _ in range(sessions)), return_exceptions=True)
+    seconds = perf_counter() - start
+    pinger.cancel()
+    latencies.sort()
+    pings.sort()
+    return {'sessions': sessions, 'finished': results.count('finished'),
+            'forfeits': results.count('forfeit'),
+            'errors': sum(isinstance(result, BaseException) for result in results),
+            'seconds': seconds, 'turns': len(latencies),
+            'turnsPerSecond': len(latencies) / seconds,
+            'turnP50ms': _quantile(latencies, 0.5), 'turnP99ms': _quantile(latencies, 0.99),
+            'pingP50ms': _quantile(pings, 0.5), 'pingP99ms': _quantile(pings, 0.99)}
+
+
+async def idleTest(idle=0.2):
+    """Check the idle timeout of a JOIN match on a local server, get lines
+    {'first': [...], 'second': [...]} which both players have received
+
+    The first player joins and waits longer than the timeout for the second
+    one, then keeps the turn longer than the timeout by a PING in between,
+    the waiting opponent must keep the connection. After the shot the player
+    of the turn stays silent and must be closed as idle, the other one wins
+    by forfeit.
+    """
+    server = await Server('127.0.0.1', 0, idle).start()
+    lines = {'first': [], 'second': []}
+    clients = {}
+
+    async def connect(name):
+        reader, writer = clients[name] = await asyncio.open_connection('127.0.0.1', server.port)
+        await reader.readline()
+        writer.write(b'JOIN 5 5\n')
+
+    async def listen(name):
+        reader, writer = clients[name]
+        while True:
+            line = (await reader.readline()).decode().strip()
+            if not line:
+                return
+            lines[name].append(line)
+            if line.startswith(('END', 'BYE')):
+                return
+
+    await connect('first')
+    await asyncio.sleep(idle * 3)
+    await connect('second')
+    listeners = [asyncio.create_task(listen(name)) for name in lines]
+    for command in (b'PING\n', b'SHOT A1\n'):
+        await asyncio.sleep(idle * 0.8)
+        clients['first'][1].write(command)
+    await asyncio.wait_for(asyncio.gather(*listeners), idle * 20)
+    for _, writer in clients.values():
+        writer.close()
+    await server.close()
+    return lines
+# end
+
+
+async def _main(args):
+    server = Server(args.host, 0 if args.local else args.port, args.idle,
+                    runner=BotRunner(args.bots, args.workers, args.move_timeout))
+    if args.idle_test:
+        lines = await idleTest()
+        for name, received in lines.items():
+            print(f'{name:<8}', ' | '.join(received))
+        return
+    if args.load is None:
+        await server.start()
+        print(f'Serving on {server.host}:{server.port}')
+        return await server.serve()
+    if args.local:
+        await server.start()
+    report = await loadTest(args.host, server.port, args.load, args.mode,
+                            args.width, args.height, args.seed)
+    if args.local:
+        report.update(('bot' + key.capitalize(), value) for key, value in server.runner.stats.items())
+    for key, value in report.items():
+        print(f'{key:<16}{value:>12.2f}' if isinstance(value, float) else f'{key:<16}{value:>12}')
+    if args.local:
+        await server.close()
+
+
+def main(args=None):
+    parser = ArgumentParser(description='Space Battle server and its load test')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--idle', type=float, default=300,
+                        help='seconds a session may stay silent')
+    parser.add_argument('--bots', default='inline', choices=('inline', 'thread', 'process'),
+                        help='where moves of the bots are computed')
+    parser.add_argument('--workers', type=int, default=None, help='size of the bot pool')
+    parser.add_argument('--move-timeout', type=float, default=None,
+                        help='seconds of a bot move before a random shot is made')
+    parser.add_argument('--load', type=int, metavar='SESSIONS', default=None,
+                        help='run the load test with the count of concurrent sessions')
+    parser.add_argument('--local', action='store_true',
+                        help='run the load test against a server in the same process')
+    parser.add_argument('--idle-test', action='store_true',
+                        help='check the idle timeout of a JOIN match on a local server')
+    parser.add_argument('--mode', default='easy', choices=MODES)
+    parser.add_argument('-W', '--width', type=int, default=12)
+    parser.add_argument('-H', '--height', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=None)
+    asyncio.run(_main(parser.parse_args(args)))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 
 class Settings:
+    __slots__ = ('fWidth', 'fHeight', 'gameMode', '__weakref__')
 
     def __init__(self, fWidth=12, fHeight=12, gameMode='easy'):
         self.fWidth = fWidth
@@ -7,7 +8,7 @@ class Settings:
         self.gameMode = gameMode
 
     def toJS(self):
-        return self.__dict__
+        return {key: getattr(self, key) for key in ('fWidth', 'fHeight', 'gameMode')}
 
 
 if __name__ == '__main__':
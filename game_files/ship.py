@@ -1,11 +1,18 @@
 from itertools import product as prod
-from weakref import WeakSet as wset, WeakValueDictionary as WValDict, ref
+from weakref import ref
 
 
 from .cells import BorderCell, ShipCell
 
 
 class Ship:
+    """Ship of Field, hits are kept as bits of an int
+
+    The box with the borders is computed once, the ship holds no cells, its
+    cells hold the ship.
+    """
+    __slots__ = ('x', 'y', 'isVertical', 'size', 'num', '_field', 'botRef',
+                 'hits', '_box')
 
     def __init__(self, x, y, isVertical, size, field, num) -> None:
         self.x, self.y = x, y
@@ -14,8 +21,8 @@ class Ship:
         self._field = ref(field)
         self.num = num
         self.botRef = None
-        self.shipCells: WValDict[int, ShipCell] = WValDict()
-        self.borderCells: wset[BorderCell] = wset()
+        # bit n is set when the cell number n has been hit
+        self.hits = 0
         self.__setShip(field)
 
     @property
@@ -39,27 +46,54 @@ class Ship:
     def __setShip(self, field):
         """set ship on the field"""
         xStart, yStart, xEnd, yEnd, shipX, shipY = self.__getShipCoords()
+        self._box = slice(yStart, yEnd), slice(xStart, xEnd)
 
         for x, y in prod(range(xStart, xEnd), range(yStart, yEnd)):
             if not field[y, x]:
                 field[y, x] = BorderCell()
-            self.borderCells.add(field[y, x])
 
-        shipCells = [ShipCell(self, num, field._hidden) for num in range(self.size)]
-        field[shipY, shipX] = shipCells
+        field[shipY, shipX] = [ShipCell(self, num, field._hidden) for num in range(self.size)]
+
+    def span(self):
+        """get slices of the ship cells"""
+        if self.isVertical:
+            return slice(self.y, self.y + self.size), self.x
+        return self.y, slice(self.x, self.x + self.size)
+
+    def box(self):
+        """get slices of the ship with its borders"""
+        return self._box
 
-        self.shipCells.update((num, cell) for num, cell in enumerate(shipCells))
+    def cells(self):
+        """get coordinates of the ship cells"""
+        if self.isVertical:
+            return [(y, self.x) for y in range(self.y, self.y + self.size)]
+        return [(self.y, x) for x in range(self.x, self.x + self.size)]
+
+    @property
+    def shipCells(self):
+        """get {number: cell} of the cells which have not been hit"""
+        return {num: cell for num, cell in enumerate(self.field.field[self.span()])
+                if not self.hits >> num & 1}
 
     def checkAlive(self, number):
-        del self.shipCells[number]
-        if not self.shipCells:
+        self.hits |= 1 << number
+        if not self:
             self.revealAll()
             self.field.removeShip(self.num)
             self.callBot()
 
     def revealAll(self):
-        for border in self.borderCells:
-            border.reveal()
+        field = self.field
+        rows, cols = self._box
+        opened = []
+        for y in range(rows.start, rows.stop):
+            for x, cell in enumerate(field.field[y, cols], cols.start):
+                if not cell.isOpened():
+                    cell.reveal()
+                    opened.append(y*field.width + x)
+        if field._watchers:
+            field._notify(opened)
 
     def addBotRef(self, bot):
         self.botRef = ref(bot)
@@ -69,4 +103,4 @@ class Ship:
             self.botRef().removeShip(self)
 
     def __bool__(self):
-        return bool(self.shipCells)
+        return self.hits != (1 << self.size) - 1
@@ -0,0 +1,122 @@
+from collections import OrderedDict
+from threading import Lock
+
+from numpy import arange, bincount, concatenate, indices, int32, stack, where, zeros
+
+
+class PlacementTable:
+    """Geometry of all placements of a ship of given size on the field
+
+    Placement n < hCount is horizontal at divmod(n, width - size + 1) as
+    (y, x), the others are vertical at divmod(n - hCount, width), like the
+    random spots of Placement.sample. Ships of size 1 are listed in both
+    directions too. Arrays are read-only, so tables built before worker
+    processes are forked are shared by them:
+
+    spots      (x, y, isVertical) of every placement
+    footprint  flat cells of the ship
+    box        flat cells of the ship with its borders, cells outside of
+               the field are replaced by the first cell of the ship
+    isBorder   mask of the box cells which are borders
+    """
+    __slots__ = ('width', 'height', 'size', 'hCount', 'spots', 'footprint', 'box',
+                 'isBorder', '_starts', '_through')
+
+    def __init__(self, width, height, size) -> None:
+        self.width, self.height, self.size = width, height, size
+        hy, hx = indices((height, max(width - size + 1, 0))).reshape(2, -1)
+        vy, vx = indices((max(height - size + 1, 0), width)).reshape(2, -1)
+        self.hCount = len(hx)
+        x, y = concatenate((hx, vx)), concatenate((hy, vy))
+        vert = arange(len(x)) >= self.hCount
+        self.spots = stack((x, y, vert), 1).astype(int32)
+        self.footprint = ((y * width + x)[:, None] +
+                          where(vert, width, 1)[:, None] * arange(size)).astype(int32)
+        # the box is 3 x (size + 2) cells along the ship
+        k = arange(3 * (size + 2))
+        along, across = k // 3, k % 3
+        dy = where(vert[:, None], along, across) - 1
+        dx = where(vert[:, None], across, along) - 1
+        by, bx = y[:, None] + dy, x[:, None] + dx
+        inField = (by >= 0) & (by < height) & (bx >= 0) & (bx < width)
+        self.box = where(inField, by * width + bx, self.footprint[:, :1]).astype(int32)
+        self.isBorder = inField & ((across != 1) | (along < 1) | (along > size))
+        # placements through every cell, ships of size 1 only once
+        unique = self.footprint[:self.hCount] if size == 1 else self.footprint
+        order = unique.ravel().argsort(kind='stable')
+        self._through = (order // size).astype(int32)
+        self._starts = zeros(width * height + 1, int32)
+        bincount(unique.ravel(), minlength=width * height).cumsum(out=self._starts[1:])
+        for array in (self.spots, self.footprint, self.box, self.isBorder,
+                      self._through, self._starts):
+            array.flags.writeable = False
+
+    def __len__(self) -> int:
+        return len(self.spots)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in (self.spots, self.footprint, self.box,
+                                              self.isBorder, self._through, self._starts))
+
+    def through(self, cell):
+        """get indexes of the placements covering the flat cell"""
+        return self._through[self._starts[cell]:self._starts[cell + 1]]
+
+
+class TableCache:
+    """Placement tables shared by the process, least recently used ones are
+    dropped when the tables take more than maxBytes"""
+
+    def __init__(self, maxBytes=64 * 2**20) -> None:
+        self.maxBytes = maxBytes
+        self._tables = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evicted': 0}
+
+    def __len__(self) -> int:
+        return len(self._tables)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def get(self, width, height, size) -> PlacementTable:
+        """get table by given field and ship size, it is built on a miss"""
+        key = (width, height, size)
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+                self.stats['hits'] += 1
+                return table
+            self.stats['misses'] += 1
+        table = PlacementTable(width, height, size)
+        with self._lock:
+            if key not in self._tables:
+                self._tables[key] = table
+                self._bytes += table.nbytes
+            while self._bytes > self.maxBytes and len(self._tables) > 1:
+                _, old = self._tables.popitem(False)
+                self._bytes -= old.nbytes
+                self.stats['evicted'] += 1
+        return table
+
+    def warm(self, width, height, sizes):
+        """Build tables of the fleet, e.g. before worker processes are forked"""
+        for size in set(sizes):
+            self.get(width, height, size)
+
+    def clear(self):
+        with self._lock:
+            self._tables.clear()
+            self._bytes = 0
+
+
+# tables of the process
+tables = TableCache()
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,135 @@
+from argparse import ArgumentParser
+from itertools import combinations
+from multiprocessing import Pool
+from time import perf_counter
+
+from . import bots
+from .match import playMatch
+from .rng import seedSequence
+
+TIERS = ('EasyBot', 'MediumBot', 'HardBot', 'VeryHardBot', 'UnrealBot',
+         'ExpertBot')
+
+
+def _playChunk(task):
+    """Play chunk of matches between two bots, runs in a worker process"""
+    first, second, games, (seed, key), width, height, maxSize = task
+    players = (getattr(bots, first)(), getattr(bots, second)())
+    wins, shots = [0, 0], [0, 0]
+    for n, matchSeed in enumerate(seedSequence(seed, key).spawn(games)):
+        # bots take turns to shoot first
+        order = players if n % 2 == 0 else players[::-1]
+        result = playMatch(*order, width, height, maxSize, log=False, seed=matchSeed)
+        winner = players.index(result.winner)
+        wins[winner] += 1
+        shots[winner] += result.playerShots[order.index(result.winner)]
+    return first, second, wins, shots
+
+
+class Tournament:
+    """Round-robin tournament between bot tiers played on a process pool
+
+    Every pair plays its games in chunks, each chunk gets its own stream of
+    match seeds spawned from the tournament seed by the pair and the chunk
+    number, so results do not depend on the number of workers or on the
+    order chunks finish in.
+    """
+
+    def __init__(self, tiers=TIERS, games=100, width=12, height=12,
+                 maxSize=None, seed=0, chunkSize=20) -> None:
+        self.tiers = tiers
+        self.games = games
+        self.width = width
+        self.height = height
+        self.maxSize = maxSize
+        self.seed = seed
+        self.chunkSize = chunkSize
+        self.stats = {name: {'wins': 0, 'losses': 0, 'shots': 0}
+                      for name in tiers}
+        self.table = {}
+
+    def tasks(self):
+        """get chunks of work for the workers"""
+        for pair, (first, second) in enumerate(combinations(self.tiers, 2)):
+            for chunk, start in enumerate(range(0, self.games, self.chunkSize)):
+                yield (first, second, min(self.chunkSize, self.games - start),
+                       (self.seed, (pair, chunk)), self.width, self.height, self.maxSize)
+
+    def run(self, workers=None):
+        """Play all matches and merge the statistics"""
+        start = perf_counter()
+        with Pool(workers) as pool:
+            for result in pool.imap_unordered(_playChunk, self.tasks()):
+                self.merge(*result)
+        self.seconds = perf_counter() - start
+        return self.stats
+
+    def merge(self, first, second, wins, shots):
+        """Merge results of one chunk"""
+        for name, enemy, won, lost, shot in ((first, second, wins[0], wins[1], shots[0]),
+                                             (second, first, wins[1], wins[0], shots[1])):
+            stats = self.stats[name]
+            stats['wins'] += won
+            stats['losses'] += lost
+            stats['shots'] += shot
+            self.table[name, enemy] = self.table.get((name, enemy), 0) + won
+
+    def shotsToWin(self, name):
+        """get average count of shots of the bot in won games"""
+        stats = self.stats[name]
+        return stats['shots'] / stats['wins'] if stats['wins'] else 0
+
+    def save(self):
+        """Add results to the bot profiles"""
+        botData = bots.BotData()
+        for name, stats in self.stats.items():
+            if name in botData:
+                bot = botData[name]
+            else:
+                bot = getattr(bots, name)()
+                botData.savePlayer(bot)
+            bot.wins += stats['wins']
+            bot.losses += stats['losses']
+            bot.shots += stats['shots']
+        botData.save()
+
+    def __str__(self) -> str:
+        rows = [f"{'bot':<12}{'wins':>8}{'losses':>8}{'win %':>8}{'shots/win':>11}"]
+        for name, stats in self.stats.items():
+            games = stats['wins'] + stats['losses']
+            rows.append(f"{name:<12}{stats['wins']:>8}{stats['losses']:>8}"
+                        f"{stats['wins'] / (games or 1):>8.1%}"
+                        f"{self.shotsToWin(name):>11.1f}")
+        return '\n'.join(rows)
+
+
+def main(args=None):
+    parser = ArgumentParser(description='Round-robin tournament between bots')
+    parser.add_argument('-g', '--games', type=int, default=100,
+                        help='games per pair of bots')
+    parser.add_argument('-s', '--size', type=int, nargs=2, default=(12, 12),
+                        metavar=('WIDTH', 'HEIGHT'))
+    parser.add_argument('-m', '--max-size', type=int, default=None,
+                        help='max size of the ships')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='worker processes, all cores by default')
+    parser.add_argument('-c', '--chunk', type=int, default=20,
+                        help='games per task given to a worker')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', action='store_true',
+                        help='add results to the bot profiles')
+    args = parser.parse_args(args)
+
+    tournament = Tournament(TIERS, args.games, *args.size, args.max_size,
+                            args.seed, args.chunk)
+    tournament.run(args.workers)
+    print(tournament)
+    games = args.games * len(tournament.table) // 2
+    print(f'{games} games in {tournament.seconds:.2f}s '
+          f'({games / tournament.seconds:.0f} games/s)')
+    if args.save:
+        tournament.save()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,63 @@
+from argparse import ArgumentParser, FileType
+import sys
+
 from game_files.game import Game
+from game_files.inputs import StreamInput
+from game_files.probe import probe
+
+
+def startupProfile(count=12):
+    """Print time of the start to the first prompt and the slowest imports
+
+    The game is started in a child process with -X importtime and without
+    input, so it exits at the sign in prompt.
+    """
+    import subprocess
+    from time import perf_counter
+    times = {}
+    for name, command in (('interpreter', [sys.executable, '-c', 'pass']),
+                          ('first prompt', [sys.executable, '-X', 'importtime', __file__])):
+        start = perf_counter()
+        result = subprocess.run(command, stdin=subprocess.DEVNULL, capture_output=True,
+                                text=True)
+        times[name] = perf_counter() - start
+    imports = []
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and not line.endswith('imported package'):
+            _, cumulative, module = line[12:].split('|')
+            # only imports made by the game itself, not by other modules
+            if not module[1:].startswith(' '):
+                imports.append((int(cumulative), module.strip()))
+    print(f"{'startup':<28}{'ms':>10}")
+    for name, seconds in times.items():
+        print(f'{name:<28}{seconds*1e3:>10.1f}')
+    print(f'{"imports":<28}{sum(us for us, _ in imports)/1e3:>10.1f}')
+    for us, module in sorted(imports, reverse=True)[:count]:
+        print(f'  {module:<26}{us/1e3:>10.1f}')
 
 
-def startGame():
-    Game()
+def startGame(args=None):
+    parser = ArgumentParser(description='Space Battle game')
+    parser.add_argument('--record', metavar='FILE', default=None,
+                        help='append records of the games to the archive')
+    parser.add_argument('--stats', action='store_true',
+                        help='print counters and timers after every game')
+    parser.add_argument('--stats-json', metavar='FILE', default=None,
+                        help='write stats of the last game as JSON, implies --stats')
+    parser.add_argument('--profile', metavar='FILE', default=None,
+                        help='write cProfile stats of the last game, implies --stats')
+    parser.add_argument('--input', metavar='FILE', type=FileType('r', encoding='utf-8'),
+                        default=None, help='read menu choices, names and coords from '
+                        'the file, - is stdin, piped stdin is read without pauses')
+    parser.add_argument('--startup-profile', action='store_true',
+                        help='print time to the first prompt and the slowest imports')
+    args = parser.parse_args(args)
+    if args.startup_profile:
+        return startupProfile()
+    if args.stats or args.stats_json or args.profile:
+        probe.enable(args.stats_json, args.profile)
+    stream = args.input or (None if sys.stdin.isatty() else sys.stdin)
+    Game(args.record, None if stream is None else StreamInput(stream, echo=True))
 
 
 if __name__ == '__main__':